@@ -0,0 +1,110 @@
+# agents/_llm.py
+from functools import lru_cache
+from langchain_openai import ChatOpenAI
+from typing import Any, Awaitable, TypeVar
+import asyncio
+import httpx
+import logging
+import os
+import string
+import threading
+
+import tiktoken
+
+@lru_cache(maxsize=None)
+def get_http_async_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide async HTTP client used for LLM calls.
+    HTTP/2 lets concurrent agent calls share one keep-alive connection
+    instead of each paying for its own TCP and TLS handshake.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=60.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+
+T = TypeVar("T")
+
+@lru_cache(maxsize=None)
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return a long-lived event loop, running in a daemon thread, for sync
+    callers of async LLM code. The shared async HTTP client keeps pooled
+    connections bound to the loop that opened them, so sync entry points
+    must reuse one loop instead of creating a new one per call.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-sync-loop", daemon=True).start()
+    return loop
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine on the shared sync loop and wait for its result.
+    Must not be called from a thread that is already running an event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
+    coro.close()
+    raise RuntimeError("run_sync() cannot be called from a running event loop; await the coroutine instead")
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    """
+    Return the process-wide sync HTTP client used for LLM calls, so sync
+    calls from every agent share one keep-alive connection pool.
+    """
+    return httpx.Client(
+        timeout=60.0,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+
+@lru_cache(maxsize=None)
+def get_llm(model: str = "gpt-4-turbo", temperature: float = 0.2) -> ChatOpenAI:
+    """
+    Return a shared chat model client for the given model and temperature.
+    Agents share one client per configuration so they also share its
+    HTTP connection pool instead of each building their own.
+    """
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        http_client=get_http_client(),
+        http_async_client=get_http_async_client()
+    )
+
+class PromptTokenCounter:
+    """
+    Token counter for a static str.format prompt template.
+    The literal parts of the template are tokenized once up front, so each
+    call only tokenizes the substituted values (in one batched call). Counts
+    are approximate at the field boundaries, which is fine for budgeting.
+    """
+    
+    def __init__(self, template: str, model: str = "gpt-4-turbo", budget: int = 120_000):
+        self.encoding = tiktoken.encoding_for_model(model)
+        self.budget = budget
+        self.logger = logging.getLogger(__name__)
+        
+        literals = []
+        self.fields = []
+        for literal, field_name, _, _ in string.Formatter().parse(template):
+            literals.append(literal)
+            if field_name is not None:
+                self.fields.append(field_name)
+        self._literal_tokens = sum(len(tokens) for tokens in self.encoding.encode_batch(literals))
+    
+    def count(self, **values: Any) -> int:
+        """Return the token count of the template formatted with the given values."""
+        encoded = self.encoding.encode_batch([str(values[field]) for field in self.fields])
+        return self._literal_tokens + sum(len(tokens) for tokens in encoded)
+    
+    def check(self, **values: Any) -> int:
+        """Count tokens like count(), logging a warning when over budget."""
+        tokens = self.count(**values)
+        if tokens > self.budget:
+            self.logger.warning(f"Prompt is {tokens} tokens, over the {self.budget} token budget")
+        return tokens
@@ -0,0 +1,57 @@
+# agents/_llm_cache.py
+import hashlib
+import threading
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+class ChainResponseCache:
+    """
+    Exact-match response cache for LLM chains, keyed on a hash of the rendered
+    prompt. There is deliberately no semantic tier: quote and optimization
+    prompts that differ only in quantities, prices or customer embed almost
+    identically, so a near match would serve another request's numbers.
+    """
+
+    def __init__(self, ttl: float = 3600, maxsize: int = 1024):
+        self._exact = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def run(self, chain, **inputs: Any) -> str:
+        """Return the chain's output for the inputs, running it only on a cache miss."""
+        key = self._key(chain.prompt.format(**inputs))
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        result = chain.run(**inputs)
+        with self._lock:
+            self._exact[key] = result
+        return result
+
+    async def arun(self, chain, **inputs: Any) -> str:
+        """Async variant of run()."""
+        key = self._key(chain.prompt.format(**inputs))
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        result = await chain.arun(**inputs)
+        with self._lock:
+            self._exact[key] = result
+        return result
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._exact.clear()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._exact.get(key)
+
+    @staticmethod
+    def _key(prompt: str) -> str:
+        return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,59 @@
+# agents/_similar_projects.py
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+
+def _to_float(value: Any) -> float:
+    """Convert a record value to float, using NaN for missing or non-numeric values."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+@dataclass
+class SimilarProjectsBatch:
+    """
+    Columnar (struct-of-arrays) view of similar projects, so pricing
+    statistics run as vectorized NumPy reductions instead of per-record
+    dict lookups. Missing numeric values are NaN.
+    """
+    ids: List[str]
+    names: List[str]
+    descriptions: List[str]
+    prices: np.ndarray
+    margins: np.ndarray
+    labor_hours: np.ndarray
+    accepted: np.ndarray
+
+    @classmethod
+    def from_records(cls, projects: List[Dict[str, Any]]) -> "SimilarProjectsBatch":
+        """Build a batch from vector store results and/or stored quotes."""
+        n = len(projects)
+        prices = np.empty(n, dtype=np.float64)
+        margins = np.empty(n, dtype=np.float64)
+        labor_hours = np.empty(n, dtype=np.float64)
+        accepted = np.zeros(n, dtype=np.bool_)
+        ids, names, descriptions = [], [], []
+
+        for i, project in enumerate(projects):
+            labor = project.get("labor")
+            ids.append(project.get("project_id") or project.get("quote_id") or "")
+            names.append(project.get("project_name") or "")
+            descriptions.append(project.get("description") or project.get("project_description") or "")
+            prices[i] = _to_float(project.get("total_price"))
+            margins[i] = _to_float(project.get("profit_margin"))
+            labor_hours[i] = _to_float(
+                project.get("labor_hours") if "labor_hours" in project
+                else labor.get("hours") if isinstance(labor, dict) else None
+            )
+            accepted[i] = project.get("status") == "accepted" or project.get("customer_satisfied") is True
+
+        return cls(ids, names, descriptions, prices, margins, labor_hours, accepted)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def known_prices(self) -> np.ndarray:
+        """Prices with missing values dropped."""
+        return self.prices[~np.isnan(self.prices)]
@@ -1,9 +1,10 @@
 # agents/coordinator.py
 from crewai import Agent, Task, Crew, Process
-from langchain.chat_models import ChatOpenAI
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Callable, Tuple
+import asyncio
 import logging
-import os
+
+from agents._llm import get_llm
 
 class CoordinatorAgent:
     """
@@ -11,51 +12,180 @@ class CoordinatorAgent:
     Acts as the central system that delegates tasks to specialized agents.
     """
     
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo",
-            temperature=0.2,
-            api_key=os.environ.get("OPENAI_API_KEY")
-        )
+    def __init__(self, llm=None):
+        self.llm = llm or get_llm("gpt-4-turbo", 0.2)
         self.agents = {}
+        self._pipelines: Dict[Tuple[bool, bool], Callable] = {}
         self.logger = logging.getLogger(__name__)
         
+        # CrewAI agents don't depend on the request, so build them once
+        self._analyst = Agent(
+            role="Data Analyst",
+            goal="Analyze project requirements and find patterns in historical data",
+            backstory="Expert in analyzing manufacturing data to uncover insights",
+            verbose=True,
+            llm=self.llm
+        )
+        
+        self._quote_expert = Agent(
+            role="Quote Generation Expert",
+            goal="Generate accurate and competitive quotes",
+            backstory="Specialist in creating detailed and precise manufacturing quotes",
+            verbose=True,
+            llm=self.llm
+        )
+        
+        self._pricing_expert = Agent(
+            role="Pricing Optimization Expert", 
+            goal="Optimize quote pricing for maximum profitability while remaining competitive",
+            backstory="Expert in balancing profit margins with market competitiveness",
+            verbose=True,
+            llm=self.llm
+        )
+        
     def register_agents(self, **agents):
         """Register all specialized agents with the coordinator."""
         self.agents = agents
+        self._pipelines.clear()
         self.logger.info(f"Registered {len(agents)} specialized agents")
+    
+    @staticmethod
+    def request_shape(request_data: Dict[str, Any]) -> Tuple[bool, bool]:
+        """
+        Classify a request by the inputs that decide which lookups are useful:
+        (has a project description, has a customer id).
+        """
+        return (
+            bool((request_data.get("project_description") or "").strip()),
+            bool(request_data.get("customer_id"))
+        )
+    
+    def compile_pipeline(self, shape: Tuple[bool, bool]) -> Callable:
+        """
+        Build the gather stage of process_quote_request (steps 1-3) for one
+        request shape, with the branches that shape can never take removed,
+        and cache it for later requests of the same shape. The pipeline
+        returns (project_analysis, similar_projects, business_rules).
+        """
+        has_description, has_customer = shape
+        
+        steps = ["data_analyst.aanalyze_project_requirements(request_data)"]
+        targets = ["project_analysis"]
+        constants = []
+        
+        # Without a description the vector search has nothing to match on
+        if has_description:
+            steps.append("data_analyst.afind_similar_projects(request_data)")
+            targets.append("similar_projects")
+        elif has_customer:
+            steps.append("data_analyst.afind_similar_projects(request_data, search_description=False)")
+            targets.append("similar_projects")
+        else:
+            constants.append("similar_projects = []")
+        
+        # Without a customer only the general rules apply
+        if has_customer:
+            steps.append("knowledge_agent.aget_business_rules(request_data['customer_id'])")
+        else:
+            steps.append("knowledge_agent.aget_business_rules()")
+        targets.append("business_rules")
+        
+        lines = [
+            "async def pipeline(request_data):",
+            f"    {', '.join(targets)} = await asyncio.gather(",
+            *(f"        {step}," for step in steps),
+            "    )",
+            *(f"    {constant}" for constant in constants),
+            "    return project_analysis, similar_projects, business_rules"
+        ]
         
-    def process_quote_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        namespace = {
+            "asyncio": asyncio,
+            "data_analyst": self.agents['data_analyst'],
+            "knowledge_agent": self.agents['knowledge_agent']
+        }
+        exec(compile("\n".join(lines), f"<quote pipeline {shape}>", "exec"), namespace)
+        
+        self.logger.info(f"Compiled quote pipeline for request shape {shape}")
+        self._pipelines[shape] = namespace["pipeline"]
+        return namespace["pipeline"]
+        
+    async def process_quote_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a new quote request by coordinating between various agents.
         """
         self.logger.info(f"Processing quote request: {request_data['project_name']}")
         
-        # Step 1: Have data analyst agent analyze project requirements
-        project_analysis = self.agents['data_analyst'].analyze_project_requirements(request_data)
-        
-        # Step 2: Check for similar past projects in the database
-        similar_projects = self.agents['data_analyst'].find_similar_projects(request_data)
-        
-        # Step 3: Get relevant business rules and constraints
-        business_rules = self.agents['knowledge_agent'].get_business_rules(request_data['customer_id'])
+        # Steps 1-3 have no dependency on each other, so the pipeline runs them
+        # concurrently: analyze project requirements, find similar past projects,
+        # and get relevant business rules and constraints
+        project_analysis, similar_projects, business_rules = await self._gather_quote_inputs(request_data)
         
         # Step 4: Generate the initial quote
-        quote_data = self.agents['quote_generator'].generate_quote(
+        quote_data = await self.agents['quote_generator'].agenerate_quote(
             request_data,
             project_analysis,
             similar_projects,
             business_rules
         )
         
+        return await self._finish_quote_request(request_data, quote_data, similar_projects, business_rules)
+    
+    async def astream_quote_request(self, request_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a new quote request like process_quote_request, streaming events:
+        "token" events with quote text as the model generates it, a "quote"
+        event with the initial quote, a "final" event with the same response
+        process_quote_request returns, and a closing "done" event.
+        """
+        self.logger.info(f"Streaming quote request: {request_data['project_name']}")
+        
+        project_analysis, similar_projects, business_rules = await self._gather_quote_inputs(request_data)
+        
+        quote_data = None
+        async for kind, payload in self.agents['quote_generator'].astream_quote(
+            request_data,
+            project_analysis,
+            similar_projects,
+            business_rules
+        ):
+            if kind == "token":
+                yield {"event": "token", "text": payload}
+            else:
+                quote_data = payload
+                yield {"event": "quote", "quote": quote_data}
+        
+        final_response = await self._finish_quote_request(request_data, quote_data, similar_projects, business_rules)
+        yield {"event": "final", "quote": final_response}
+        yield {"event": "done", "quote_id": final_response["quote_id"]}
+    
+    async def _gather_quote_inputs(self, request_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Steps 1-3, run by the pipeline compiled for the request's shape.
+        """
+        shape = self.request_shape(request_data)
+        pipeline = self._pipelines.get(shape) or self.compile_pipeline(shape)
+        return await pipeline(request_data)
+    
+    async def _finish_quote_request(self,
+                                    request_data: Dict[str, Any],
+                                    quote_data: Dict[str, Any],
+                                    similar_projects: List[Dict[str, Any]],
+                                    business_rules: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Steps 5 and 6 of process_quote_request, applied to a generated quote.
+        """
         # Step 5: Optimize pricing strategy
-        optimized_quote = self.agents['pricing_optimizer'].optimize_pricing(
+        optimized_quote = await self.agents['pricing_optimizer'].aoptimize_pricing(
             quote_data,
             similar_projects
         )
         
-        # Step 6: Generate explanations and recommendations
-        recommendations = self.agents['knowledge_agent'].generate_recommendations(optimized_quote)
+        # Step 6: Generate recommendations for the quote the caller receives
+        recommendations = await self.agents['knowledge_agent'].agenerate_recommendations(
+            optimized_quote,
+            business_rules
+        )
         
         # Compile final response
         final_response = {
@@ -85,13 +215,34 @@ class CoordinatorAgent:
         optimized_quote = self.agents['pricing_optimizer'].deep_optimize(quote_data)
         
         # Update recommendations
-        recommendations = self.agents['knowledge_agent'].generate_recommendations(optimized_quote)
+        business_rules = self.agents['knowledge_agent'].get_business_rules(optimized_quote.get("customer_id"))
+        recommendations = self.agents['knowledge_agent'].generate_recommendations(optimized_quote, business_rules)
         
         # Return optimized quote
         optimized_quote["recommendations"] = recommendations
         
         return optimized_quote
     
+    async def aoptimize_quote(self, quote_id: str) -> Dict[str, Any]:
+        """
+        Async variant of optimize_quote.
+        """
+        quote_data = await asyncio.to_thread(self.agents['data_analyst'].get_quote, quote_id)
+        if not quote_data:
+            raise ValueError(f"Quote with ID {quote_id} not found")
+        
+        # The customer's business rules don't depend on the optimization, so fetch them meanwhile
+        optimized_quote, business_rules = await asyncio.gather(
+            self.agents['pricing_optimizer'].adeep_optimize(quote_data),
+            self.agents['knowledge_agent'].aget_business_rules(quote_data.get("customer_id"))
+        )
+        optimized_quote["recommendations"] = await self.agents['knowledge_agent'].agenerate_recommendations(
+            optimized_quote,
+            business_rules
+        )
+        
+        return optimized_quote
+    
     def process_feedback(self, feedback_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process feedback on quotes to improve future quote generation.
@@ -118,55 +269,30 @@ class CoordinatorAgent:
         Alternative implementation using CrewAI's structured workflow approach.
         This demonstrates how to use the CrewAI framework for larger agent systems.
         """
-        # Define agents for CrewAI
-        analyst = Agent(
-            role="Data Analyst",
-            goal="Analyze project requirements and find patterns in historical data",
-            backstory="Expert in analyzing manufacturing data to uncover insights",
-            verbose=True,
-            llm=self.llm
-        )
-        
-        quote_expert = Agent(
-            role="Quote Generation Expert",
-            goal="Generate accurate and competitive quotes",
-            backstory="Specialist in creating detailed and precise manufacturing quotes",
-            verbose=True,
-            llm=self.llm
-        )
-        
-        pricing_expert = Agent(
-            role="Pricing Optimization Expert", 
-            goal="Optimize quote pricing for maximum profitability while remaining competitive",
-            backstory="Expert in balancing profit margins with market competitiveness",
-            verbose=True,
-            llm=self.llm
-        )
-        
         # Define tasks
         analyze_task = Task(
             description=f"Analyze the following project requirements: {request_data['project_description']}",
-            agent=analyst,
+            agent=self._analyst,
             expected_output="Detailed analysis of project requirements and potential challenges"
         )
         
         quote_task = Task(
             description="Generate a detailed quote based on the project analysis",
-            agent=quote_expert,
+            agent=self._quote_expert,
             expected_output="Complete quote with line-item breakdowns",
             context=[analyze_task]
         )
         
         optimize_task = Task(
             description="Optimize the quote pricing for maximum profitability",
-            agent=pricing_expert,
+            agent=self._pricing_expert,
             expected_output="Optimized quote with pricing recommendations",
             context=[quote_task]
         )
         
         # Create crew with sequential process
         crew = Crew(
-            agents=[analyst, quote_expert, pricing_expert],
+            agents=[self._analyst, self._quote_expert, self._pricing_expert],
             tasks=[analyze_task, quote_task, optimize_task],
             verbose=True,
             process=Process.sequential
@@ -1,10 +1,84 @@
 # agents/data_analyst.py
-from langchain.chat_models import ChatOpenAI
-from langchain.chains import LLMChain
-from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any, List, Optional
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+import asyncio
+import hashlib
+import json
 import logging
-import os
+import random
+
+import openai
+import orjson
+
+from agents._llm import get_llm, run_sync, PromptTokenCounter
+
+class ProjectAnalysis(BaseModel):
+    """Structured project analysis produced by the LLM."""
+    complexity_factors: List[str] = Field(description="Complexity factors that might impact cost")
+    risks: List[str] = Field(description="Risks that should be accounted for in pricing")
+    material_considerations: List[str] = Field(description="Material availability, price volatility, etc.")
+    labor_requirements: List[str] = Field(description="Labor intensity and specialized skills required")
+    timeline_feasibility: List[str] = Field(description="Timeline feasibility and potential bottlenecks")
+
+class _JsonFieldStream:
+    """
+    Incremental parser for a streamed JSON object that returns each top-level
+    field as soon as its value is complete.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        self._pos = None  # Position just after the opening brace, once seen
+        self._decoder = json.JSONDecoder()
+        self.done = False
+    
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add streamed text and return any top-level fields completed by it."""
+        self._buffer += text
+        fields = []
+        
+        if self._pos is None:
+            start = self._buffer.find("{")
+            if start == -1:
+                return fields
+            self._pos = start + 1
+        
+        buffer = self._buffer
+        while not self.done:
+            pos = self._skip(buffer, self._pos, " \t\r\n,")
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "}":
+                self.done = True
+                break
+            
+            try:
+                key, pos = self._decoder.raw_decode(buffer, pos)
+                pos = self._skip(buffer, pos, " \t\r\n")
+                if pos >= len(buffer):
+                    break
+                if buffer[pos] != ":" or not isinstance(key, str):
+                    self.done = True  # Not a JSON object we can follow
+                    break
+                value, end = self._decoder.raw_decode(buffer, self._skip(buffer, pos + 1, " \t\r\n"))
+            except json.JSONDecodeError:
+                break  # Value not complete yet, wait for more text
+            
+            # A value ending exactly at the buffer end may be a truncated number
+            if end >= len(buffer):
+                break
+            
+            fields.append((key, value))
+            self._pos = end
+        
+        return fields
+    
+    @staticmethod
+    def _skip(buffer: str, pos: int, chars: str) -> int:
+        while pos < len(buffer) and buffer[pos] in chars:
+            pos += 1
+        return pos
 
 class DataAnalystAgent:
     """
@@ -12,18 +86,14 @@ class DataAnalystAgent:
     and extracting insights from historical quotes and project data.
     """
     
-    def __init__(self, vector_db, structured_db):
+    def __init__(self, vector_db, structured_db, llm=None):
         self.vector_db = vector_db
         self.structured_db = structured_db
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo",
-            temperature=0.2,
-            api_key=os.environ.get("OPENAI_API_KEY")
-        )
+        self.llm = llm or get_llm("gpt-4-turbo", 0.2)
         self.logger = logging.getLogger(__name__)
         
-        # Initialize analysis prompt template
-        self.analysis_prompt = ChatPromptTemplate.from_template("""
+        # Analysis prompt; formatted with str.format and sent straight to the model
+        self._analysis_tmpl = """
             You are an expert data analyst specializing in manufacturing projects and quotes.
             
             ## Project Details
@@ -45,10 +115,37 @@ class DataAnalystAgent:
             5. Timeline feasibility and potential bottlenecks
             
             Format your analysis as a structured JSON with clear sections for each area.
-        """)
+        """
         
-        # Create the analysis chain
-        self.analysis_chain = LLMChain(llm=self.llm, prompt=self.analysis_prompt)
+        # Market insights prompt
+        self._insights_tmpl = """
+            You are an expert data analyst specializing in manufacturing quoting trends.
+            
+            Analyze the following analytics data from our quote database:
+            
+            {analytics_data}
+            
+            Based on this data, provide strategic insights about:
+            
+            1. Win rate trends and potential factors affecting them
+            2. Pricing strategies that seem most effective
+            3. Industry or customer segments that show the most promising opportunities
+            4. Recommendations for optimizing our quoting process
+            
+            Format your insights as a concise, actionable report with clear recommendations.
+        """
+        
+        # Tokenize the static parts of the prompts once, for prompt-size checks
+        self._analysis_tokens = PromptTokenCounter(self._analysis_tmpl)
+        self._insights_tokens = PromptTokenCounter(self._insights_tmpl)
+        
+        # Constrain the analysis output to the ProjectAnalysis schema via function
+        # calling; gpt-4-turbo doesn't support the json_schema response format
+        self.analysis_llm = self.llm.with_structured_output(ProjectAnalysis, method="function_calling")
+        
+        # In-flight async analyses keyed by a hash of the rendered prompt, so
+        # identical concurrent requests share one LLM call
+        self._inflight: Dict[str, asyncio.Task] = {}
         
     def analyze_project_requirements(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -57,51 +154,176 @@ class DataAnalystAgent:
         self.logger.info(f"Analyzing project requirements for: {request_data['project_name']}")
         
         # Execute the LLM chain to analyze the project
-        analysis_result = self.analysis_chain.run(
-            project_name=request_data["project_name"],
-            project_description=request_data["project_description"],
-            materials=request_data["materials"],
-            labor_hours=request_data.get("labor_hours", "Not specified"),
-            deadline=request_data.get("deadline", "Not specified"),
-            special_requirements=request_data.get("special_requirements", "None")
-        )
+        try:
+            analysis = self.analysis_llm.invoke(self._analysis_prompt(request_data))
+        except (OutputParserException, ValidationError) as e:
+            return self._analysis_failed(e)
+        
+        return analysis.model_dump()
+    
+    async def aanalyze_project_requirements(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of analyze_project_requirements, used when the coordinator
+        runs independent steps concurrently.
+        """
+        self.logger.info(f"Analyzing project requirements for: {request_data['project_name']}")
         
-        # Process and structure the analysis result
+        prompt = self._analysis_prompt(request_data)
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        
+        # Join an identical analysis that is already running instead of starting another
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._do_analyze(prompt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.logger.info(f"Joining in-flight analysis for: {request_data['project_name']}")
+        
+        # Shield the shared task so one cancelled caller doesn't cancel it for the others
+        return dict(await asyncio.shield(task))
+    
+    async def _do_analyze(self, prompt: str) -> Dict[str, Any]:
+        """
+        Run one structured analysis call for a rendered prompt.
+        """
         try:
-            import json
-            structured_analysis = json.loads(analysis_result)
-        except json.JSONDecodeError:
-            self.logger.error("Failed to parse analysis result as JSON")
-            # Fallback with raw text
-            structured_analysis = {
-                "raw_analysis": analysis_result,
-                "error": "Failed to structure analysis properly"
-            }
+            analysis = await self.analysis_llm.ainvoke(prompt)
+        except (OutputParserException, ValidationError) as e:
+            return self._analysis_failed(e)
         
-        return structured_analysis
+        return analysis.model_dump()
     
-    def find_similar_projects(self, request_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def astream_analysis(self, request_data: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream the project analysis, yielding (field_name, value) pairs for each
+        top-level section as soon as the model has finished generating it.
+        """
+        self.logger.info(f"Streaming project analysis for: {request_data['project_name']}")
+        
+        parser = _JsonFieldStream()
+        
+        async for chunk in self.llm.astream(self._analysis_prompt(request_data)):
+            for field in parser.feed(chunk.content):
+                yield field
+    
+    async def aanalyze_project_requirements_batch(self,
+                                                  request_batch: List[Dict[str, Any]],
+                                                  max_concurrency: int = 50,
+                                                  max_retries: int = 5) -> List[Dict[str, Any]]:
+        """
+        Analyze many quote requests concurrently, returning results in input order.
+        Concurrency is capped to respect API rate limits, and rate-limited calls
+        are retried with exponential backoff.
+        """
+        self.logger.info(f"Analyzing batch of {len(request_batch)} project requests")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze(request_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                for attempt in range(max_retries):
+                    try:
+                        return await self.aanalyze_project_requirements(request_data)
+                    except openai.RateLimitError:
+                        if attempt == max_retries - 1:
+                            raise
+                        delay = 2 ** attempt + random.random()
+                        self.logger.warning(f"Rate limited, retrying analysis in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+        
+        results = await asyncio.gather(
+            *(analyze(request_data) for request_data in request_batch),
+            return_exceptions=True
+        )
+        
+        analyses = []
+        for request_data, result in zip(request_batch, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Analysis failed for {request_data.get('project_name')}: {str(result)}")
+                result = {
+                    "error": f"Failed to analyze project: {str(result)}"
+                }
+            analyses.append(result)
+        
+        return analyses
+    
+    def analyze_project_requirements_batch(self, request_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Synchronous entry point for batch analysis, e.g. from offline jobs.
+        Runs on the shared long-lived loop rather than a fresh asyncio.run()
+        loop, whose closing would strand the pooled LLM connections.
+        """
+        return run_sync(self.aanalyze_project_requirements_batch(request_batch))
+    
+    def _analysis_prompt(self, request_data: Dict[str, Any]) -> str:
+        """
+        Fill the analysis prompt from a quote request.
+        """
+        values = {
+            "project_name": request_data["project_name"],
+            "project_description": request_data["project_description"],
+            "materials": request_data["materials"],
+            "labor_hours": request_data.get("labor_hours", "Not specified"),
+            "deadline": request_data.get("deadline", "Not specified"),
+            "special_requirements": request_data.get("special_requirements", "None")
+        }
+        self._analysis_tokens.check(**values)
+        return self._analysis_tmpl.format(**values)
+    
+    def _analysis_failed(self, error: Exception) -> Dict[str, Any]:
+        """
+        Fallback analysis when the model output does not match the schema.
+        """
+        self.logger.error(f"Failed to parse structured analysis: {str(error)}")
+        return {
+            "raw_analysis": str(error),
+            "error": "Failed to structure analysis properly"
+        }
+    
+    def find_similar_projects(self,
+                              request_data: Dict[str, Any],
+                              search_description: bool = True) -> List[Dict[str, Any]]:
         """
         Find historical projects similar to the current request.
+        Set search_description=False to skip the vector search, e.g. for an
+        empty project description, and only use the customer's past quotes.
         """
         self.logger.info(f"Finding similar projects for: {request_data['project_name']}")
         
+        max_results = 10  # Limit to top 10 most relevant
+        
         # Use the project description to search for similar projects
-        project_description = request_data["project_description"]
-        similar_projects = self.vector_db.search_similar_projects(project_description)
+        similar_projects = []
+        if search_description:
+            project_description = request_data["project_description"]
+            similar_projects = self.vector_db.search_similar_projects(project_description)
+        
+        # Merge results keyed on a unified id, removing duplicates
+        seen: Dict[str, Dict[str, Any]] = {}
+        for project in similar_projects:
+            if len(seen) >= max_results:
+                break
+            seen.setdefault(project.get("project_id") or project.get("quote_id"), project)
         
         # If we have a customer ID, also check the structured DB for this customer's past quotes
-        if "customer_id" in request_data:
+        if "customer_id" in request_data and len(seen) < max_results:
             customer_quotes = self.structured_db.get_customer_quotes(request_data["customer_id"])
             
-            # Merge results, removing duplicates
-            existing_ids = {p.get("project_id") for p in similar_projects}
             for quote in customer_quotes:
-                if quote.get("quote_id") not in existing_ids:
-                    similar_projects.append(quote)
-                    existing_ids.add(quote.get("quote_id"))
+                if len(seen) >= max_results:
+                    break
+                seen.setdefault(quote.get("project_id") or quote.get("quote_id"), quote)
         
-        return similar_projects[:10]  # Limit to top 10 most relevant
+        return list(seen.values())
+    
+    async def afind_similar_projects(self,
+                                     request_data: Dict[str, Any],
+                                     search_description: bool = True) -> List[Dict[str, Any]]:
+        """
+        Async variant of find_similar_projects. The vector and SQLite lookups
+        are blocking, so they run in a worker thread.
+        """
+        return await asyncio.to_thread(self.find_similar_projects, request_data, search_description)
     
     def get_quote(self, quote_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -111,9 +333,15 @@ class DataAnalystAgent:
     
     def record_feedback(self, quote_id: str, feedback: str, accepted: bool) -> bool:
         """
-        Record customer feedback on a quote.
+        Record customer feedback on a quote. Accepted quotes are added to the
+        similar-successful-quotes index.
         """
-        return self.structured_db.record_feedback(quote_id, feedback, accepted)
+        recorded = self.structured_db.record_feedback(quote_id, feedback, accepted)
+        
+        if recorded and accepted:
+            self.vector_db.index_successful_quotes([self.structured_db.get_quote(quote_id)])
+        
+        return recorded
     
     def get_market_insights(self) -> Dict[str, Any]:
         """
@@ -125,26 +353,9 @@ class DataAnalystAgent:
         analytics_data = self.structured_db.get_quote_analytics()
         
         # Use LLM to generate insights from the analytics
-        insights_prompt = ChatPromptTemplate.from_template("""
-            You are an expert data analyst specializing in manufacturing quoting trends.
-            
-            Analyze the following analytics data from our quote database:
-            
-            {analytics_data}
-            
-            Based on this data, provide strategic insights about:
-            
-            1. Win rate trends and potential factors affecting them
-            2. Pricing strategies that seem most effective
-            3. Industry or customer segments that show the most promising opportunities
-            4. Recommendations for optimizing our quoting process
-            
-            Format your insights as a concise, actionable report with clear recommendations.
-        """)
-        
-        insights_chain = LLMChain(llm=self.llm, prompt=insights_prompt)
-        
-        insights_text = insights_chain.run(analytics_data=str(analytics_data))
+        analytics_json = orjson.dumps(analytics_data, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+        self._insights_tokens.check(analytics_data=analytics_json)
+        insights_text = self.llm.invoke(self._insights_tmpl.format(analytics_data=analytics_json)).content
         
         # Combine raw analytics with generated insights
         return {
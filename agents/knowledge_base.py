@@ -1,10 +1,15 @@
 # agents/knowledge_base.py
-from langchain.chat_models import ChatOpenAI
-from langchain.chains import LLMChain
-from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
 import logging
-import os
+import re
+import threading
+
+import orjson
+from cachetools import TTLCache
+
+from agents._llm import get_llm, PromptTokenCounter
 
 class KnowledgeBaseAgent:
     """
@@ -12,17 +17,24 @@ class KnowledgeBaseAgent:
     and generates recommendations based on domain expertise.
     """
     
-    def __init__(self, vector_db):
+    # Leading bullet markers ("- ", "* ", "• ", "· ", "1. ", ...) on recommendation lines
+    _BULLET_RE = re.compile(r"^\s*(?:[-*•·]|\d+\.)\s+")
+    
+    # Quotes at or below these bounds get rule-based recommendations instead of an LLM call
+    SIMPLE_QUOTE_MAX_PRICE = 1000
+    SIMPLE_QUOTE_MIN_CONFIDENCE = 0.9
+    
+    # Per-quote fields that don't change the advice; left out of the prompt so
+    # otherwise identical quotes render the same prompt and share a cache entry
+    VOLATILE_QUOTE_FIELDS = ("quote_id", "timestamp")
+    
+    def __init__(self, vector_db, llm=None):
         self.vector_db = vector_db
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo",
-            temperature=0.2,
-            api_key=os.environ.get("OPENAI_API_KEY")
-        )
+        self.llm = llm or get_llm("gpt-4-turbo", 0.2)
         self.logger = logging.getLogger(__name__)
         
-        # Initialize recommendation prompt template
-        self.recommendation_prompt = ChatPromptTemplate.from_template("""
+        # Recommendation prompt; formatted with str.format and sent straight to the model
+        self._recommendation_tmpl = """
             You are an expert manufacturing consultant with extensive industry knowledge.
             
             ## Quote Details
@@ -38,15 +50,27 @@ class KnowledgeBaseAgent:
             
             Format your recommendations as concise, actionable bullet points that
             a manufacturing company could use when discussing this quote with the client.
-        """)
+        """
+        self._recommendation_tokens = PromptTokenCounter(self._recommendation_tmpl)
         
-        # Create the recommendation chain
-        self.recommendation_chain = LLMChain(llm=self.llm, prompt=self.recommendation_prompt)
+        # Recommendations keyed on a hash of the rendered prompt, so only quotes
+        # with identical details share them
+        self.recommendation_cache = TTLCache(maxsize=1024, ttl=3600)
+        self._recommendation_lock = threading.Lock()
+        
+        # Business rules change rarely, so cache them per customer
+        self._rules_cache = TTLCache(maxsize=10_000, ttl=600)
+        self._rules_lock = threading.RLock()
         
     def get_business_rules(self, customer_id: str = None) -> Dict[str, Any]:
         """
         Retrieve relevant business rules for quoting based on customer and project type.
         """
+        with self._rules_lock:
+            cached_rules = self._rules_cache.get(customer_id)
+        if cached_rules is not None:
+            return self._copy_rules(cached_rules)
+        
         self.logger.info(f"Retrieving business rules for customer: {customer_id}")
         
         # Get rules from vector DB
@@ -87,46 +111,180 @@ class KnowledgeBaseAgent:
                 }
             ]
         
+        # Cache a private copy so callers can't mutate the cached entry
+        with self._rules_lock:
+            self._rules_cache[customer_id] = self._copy_rules(rules_by_category)
+        
         return rules_by_category
     
-    def generate_recommendations(self, quote_data: Dict[str, Any]) -> List[str]:
+    @staticmethod
+    def _copy_rules(rules_by_category: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy a rules mapping down to the individual rule dicts.
+        """
+        return {
+            category: [dict(rule) for rule in rules]
+            for category, rules in rules_by_category.items()
+        }
+    
+    def invalidate_customer(self, customer_id: str = None) -> None:
+        """
+        Drop cached business rules for a customer, e.g. after its rules change.
+        """
+        with self._rules_lock:
+            self._rules_cache.pop(customer_id, None)
+    
+    async def aget_business_rules(self, customer_id: str = None) -> Dict[str, Any]:
+        """
+        Async variant of get_business_rules. The vector DB lookup is blocking,
+        so it runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.get_business_rules, customer_id)
+    
+    def generate_recommendations(self,
+                                 quote_data: Dict[str, Any],
+                                 business_rules: Optional[Dict[str, Any]] = None) -> List[str]:
         """
         Generate strategic recommendations based on quote details.
+        Small, high-confidence quotes get recommendations built from the
+        business rules instead of an LLM call.
         """
         self.logger.info(f"Generating recommendations for quote: {quote_data.get('quote_id', 'new quote')}")
         
-        # Format quote data for the prompt
-        import json
-        quote_details = json.dumps(quote_data, indent=2)
+        if not self._should_use_llm(quote_data):
+            if business_rules is None:
+                business_rules = self.get_business_rules(quote_data.get("customer_id"))
+            return self._rule_based_recommendations(business_rules)
+        
+        # Check the cache for an equivalent quote first
+        prompt = self._recommendation_prompt(quote_data)
+        cache_key = self._recommendation_cache_key(prompt)
+        with self._recommendation_lock:
+            cached_recommendations = self.recommendation_cache.get(cache_key)
+        if cached_recommendations is not None:
+            self.logger.info("Returning cached recommendations for equivalent quote")
+            return list(cached_recommendations)
         
-        # Execute the recommendation chain
-        recommendations_text = self.recommendation_chain.run(quote_details=quote_details)
+        # Ask the model for recommendations
+        recommendations_text = self.llm.invoke(prompt).content
         
         # Process the recommendations into a list
         recommendations_list = self._process_recommendations(recommendations_text)
         
+        with self._recommendation_lock:
+            self.recommendation_cache[cache_key] = tuple(recommendations_list)
+        
+        return recommendations_list
+    
+    async def agenerate_recommendations(self,
+                                        quote_data: Dict[str, Any],
+                                        business_rules: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Async variant of generate_recommendations.
+        """
+        self.logger.info(f"Generating recommendations for quote: {quote_data.get('quote_id', 'new quote')}")
+        
+        if not self._should_use_llm(quote_data):
+            if business_rules is None:
+                business_rules = await self.aget_business_rules(quote_data.get("customer_id"))
+            return self._rule_based_recommendations(business_rules)
+        
+        prompt = self._recommendation_prompt(quote_data)
+        cache_key = self._recommendation_cache_key(prompt)
+        with self._recommendation_lock:
+            cached_recommendations = self.recommendation_cache.get(cache_key)
+        if cached_recommendations is not None:
+            self.logger.info("Returning cached recommendations for equivalent quote")
+            return list(cached_recommendations)
+        
+        response = await self.llm.ainvoke(prompt)
+        recommendations_text = response.content
+        
+        recommendations_list = self._process_recommendations(recommendations_text)
+        
+        with self._recommendation_lock:
+            self.recommendation_cache[cache_key] = tuple(recommendations_list)
+        
         return recommendations_list
     
+    def _should_use_llm(self, quote_data: Dict[str, Any]) -> bool:
+        """
+        Decide whether a quote warrants LLM recommendations. Single-item quotes
+        under the price bound with a high confidence score get formulaic
+        advice, so the business rules are enough for them.
+        """
+        try:
+            total_price = float(quote_data.get("total_price"))
+            confidence = float(quote_data.get("confidence_score"))
+        except (TypeError, ValueError):
+            return True
+        
+        # The quote prompt asks for a 0-100 score; treat values above 1 as percentages
+        if confidence > 1:
+            confidence /= 100
+        
+        breakdown = quote_data.get("breakdown") or {}
+        return not (
+            len(breakdown) <= 1
+            and total_price < self.SIMPLE_QUOTE_MAX_PRICE
+            and confidence > self.SIMPLE_QUOTE_MIN_CONFIDENCE
+        )
+    
+    def _rule_based_recommendations(self, business_rules: Dict[str, Any]) -> List[str]:
+        """
+        Build recommendations for a simple quote from the applicable business rules.
+        """
+        # Customer-specific rules first, then the closest matches within each group.
+        # relevance_score is the vector store's distance, so lower is more relevant.
+        rules = sorted(
+            ((category, rule) for category, category_rules in business_rules.items()
+             for rule in category_rules),
+            key=lambda item: (item[0] == "general", item[1].get("relevance_score", 0))
+        )
+        rules = [rule for _, rule in rules]
+        
+        recommendations = [
+            "Keep the proposal brief: this is a small, single-item quote with a high-confidence price"
+        ]
+        recommendations.extend(
+            f"Confirm the quote follows: {rule['description']}"
+            for rule in rules[:5]
+            if rule.get("description")
+        )
+        return recommendations
+    
+    def _recommendation_prompt(self, quote_data: Dict[str, Any]) -> str:
+        """
+        Fill the recommendation prompt from quote data.
+        """
+        quote_details = self._format_quote_details(quote_data)
+        self._recommendation_tokens.check(quote_details=quote_details)
+        return self._recommendation_tmpl.format(quote_details=quote_details)
+    
+    def _format_quote_details(self, quote_data: Dict[str, Any]) -> str:
+        """
+        Format quote data compactly for the prompt; indentation only adds tokens.
+        Keys are sorted so equal quotes always render the same text.
+        """
+        details = {k: v for k, v in quote_data.items() if k not in self.VOLATILE_QUOTE_FIELDS}
+        return orjson.dumps(
+            details, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+        ).decode()
+    
+    @staticmethod
+    def _recommendation_cache_key(prompt: str) -> str:
+        """
+        Hash the full rendered recommendation prompt into an exact-match cache key.
+        """
+        return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    
     def _process_recommendations(self, recommendations_text: str) -> List[str]:
         """
         Process raw recommendations text into a structured list.
         """
-        # Split the text by lines and clean up bullet points
-        lines = recommendations_text.strip().split("\n")
-        
-        # Filter empty lines and cleanup bullet point formats
-        processed_lines = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Remove common bullet point markers
-            for marker in ["- ", "* ", "• ", "· ", "1. ", "2. ", "3. ", "4. ", "5. "]:
-                if line.startswith(marker):
-                    line = line[len(marker):]
-                    break
-                    
-            processed_lines.append(line)
-        
-        return processed_lines
\ No newline at end of file
+        # Split the text by lines, dropping empty lines and bullet point markers
+        return [
+            self._BULLET_RE.sub("", line.strip(), count=1)
+            for line in recommendations_text.splitlines()
+            if line.strip()
+        ]
\ No newline at end of file
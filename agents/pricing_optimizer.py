@@ -1,11 +1,56 @@
 # agents/pricing_optimizer.py
-from langchain.chat_models import ChatOpenAI
 from langchain.chains import LLMChain
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+from functools import lru_cache
+import asyncio
 import logging
-import os
-import json
+import math
+import threading
+
+import numpy as np
+import orjson
+from cachetools import TTLCache, cached
+
+from agents._llm import get_llm
+from agents._llm_cache import ChainResponseCache
+from agents._similar_projects import SimilarProjectsBatch
+
+@lru_cache(maxsize=256)
+def _render_similar_projects(rows: Tuple[Tuple[Any, ...], ...]) -> str:
+    """
+    Render the similar projects section of the optimization prompt. Each row is
+    (project_name, total_price, status, customer_satisfied, breakdown items or None).
+    """
+    formatted_data = []
+    append = formatted_data.append
+    for idx, (name, total_price, status, _, breakdown) in enumerate(rows, 1):
+        parts = [
+            f"Project {idx}: {name}\n"
+            f"  - Total Price: ${total_price or 0:,.2f}\n"
+            f"  - Status: {status}\n"
+        ]
+        
+        if breakdown is not None:
+            parts.append("  - Cost Breakdown:\n")
+            parts.extend(f"    * {category.capitalize()}: ${amount:,.2f}\n" for category, amount in breakdown)
+        
+        append("".join(parts))
+    
+    # Summarize the price distribution across all similar projects
+    batch = SimilarProjectsBatch.from_records([
+        {"total_price": total_price, "status": status, "customer_satisfied": satisfied}
+        for _, total_price, status, satisfied, _ in rows
+    ])
+    prices = batch.known_prices()
+    if prices.size:
+        p25, p50, p75 = np.percentile(prices, [25, 50, 75])
+        formatted_data.append(
+            f"Price Summary: median ${p50:,.2f} (P25 ${p25:,.2f}, P75 ${p75:,.2f}), "
+            f"mean ${prices.mean():,.2f}, won {int(batch.accepted.sum())} of {len(batch)} projects"
+        )
+    
+    return "\n".join(formatted_data)
 
 class PricingOptimizerAgent:
     """
@@ -13,34 +58,33 @@ class PricingOptimizerAgent:
     to maximize win probability while maintaining desired margins.
     """
     
-    def __init__(self, vector_db, structured_db):
+    # Quote and customer fields the optimization prompt uses; everything else
+    # (ids, timestamps, metadata) only costs input tokens
+    PROMPT_QUOTE_FIELDS = ("customer_id", "total_price", "breakdown", "materials", "labor",
+                           "profit_margin", "confidence_score", "complexity")
+    PROMPT_CUSTOMER_FIELDS = ("industry", "relationship_length", "win_rate",
+                              "avg_project_size", "total_projects")
+    
+    def __init__(self, vector_db, structured_db, llm=None):
         self.vector_db = vector_db
         self.structured_db = structured_db
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo",
-            temperature=0.1,
-            api_key=os.environ.get("OPENAI_API_KEY")
-        )
+        self.llm = llm or get_llm("gpt-4-turbo", 0.1)
         self.logger = logging.getLogger(__name__)
         
-        # Initialize optimization prompt template
-        self.optimization_prompt = ChatPromptTemplate.from_template("""
+        # Successful similar projects per (quote, price bucket), refreshed every 5 minutes
+        self._successful_cache = TTLCache(maxsize=1024, ttl=300)
+        self._successful_lock = threading.Lock()
+        
+        # Initialize optimization prompt template. The static instructions form the
+        # system message and the per-quote details come last, so every call shares
+        # the same prompt prefix and can hit the provider's prompt cache
+        self.optimization_prompt = ChatPromptTemplate.from_messages([
+            ("system", """
             You are an expert manufacturing pricing strategist with years of experience.
             
-            ## Quote Details
-            {quote_details}
-            
-            ## Similar Projects Pricing
-            {similar_projects_pricing}
-            
-            ## Customer Information
-            {customer_info}
-            
-            ## Market Conditions
-            Current market conditions suggest materials costs are {market_trend} and competition is {competition_level}.
-            
             ## Optimization Task
-            Optimize the pricing in this quote to maximize our win probability while maintaining healthy margins.
+            Optimize the pricing in the quote you are given to maximize our win probability
+            while maintaining healthy margins.
             
             Consider:
             1. The customer's history and relationship with us
@@ -56,17 +100,59 @@ class PricingOptimizerAgent:
             4. Expected impact on win probability and profit margin
             
             Format your response as JSON with clear recommendations and rationale.
-        """)
+            """),
+            ("human", """
+            ## Market Conditions
+            Current market conditions suggest materials costs are {market_trend} and competition is {competition_level}.
+            
+            ## Customer Information
+            {customer_info}
+            
+            ## Similar Projects Pricing
+            {similar_projects_pricing}
+            
+            ## Quote Details
+            {quote_details}
+            """)
+        ])
         
         # Create the optimization chain
         self.optimization_chain = LLMChain(llm=self.llm, prompt=self.optimization_prompt)
         
+        # Serve exact repeats of an optimization prompt from cache
+        self.response_cache = ChainResponseCache()
+        
     def optimize_pricing(self, quote_data: Dict[str, Any], similar_projects: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Optimize the pricing of a quote based on historical data and market conditions.
         """
-        self.logger.info(f"Optimizing pricing for quote: {quote_data.get('quote_id', 'new quote')}")
+        self.logger.info("Optimizing pricing for quote: %s", quote_data.get("quote_id", "new quote"))
+        
+        # Execute the LLM chain to optimize pricing
+        optimization_result = self.response_cache.run(
+            self.optimization_chain,
+            **self._optimization_inputs(quote_data, similar_projects)
+        )
         
+        # Apply the optimizations to the quote
+        return self._apply_optimizations(quote_data, self._parse_optimization(optimization_result))
+    
+    async def aoptimize_pricing(self, quote_data: Dict[str, Any], similar_projects: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Async variant of optimize_pricing.
+        """
+        self.logger.info("Optimizing pricing for quote: %s", quote_data.get("quote_id", "new quote"))
+        
+        # Customer lookups hit SQLite, so build the prompt inputs off the event loop
+        inputs = await asyncio.to_thread(self._optimization_inputs, quote_data, similar_projects)
+        optimization_result = await self.response_cache.arun(self.optimization_chain, **inputs)
+        
+        return self._apply_optimizations(quote_data, self._parse_optimization(optimization_result))
+    
+    def _optimization_inputs(self, quote_data: Dict[str, Any], similar_projects: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the optimization prompt variables for a quote.
+        """
         # Extract customer information if available
         customer_info = self._get_customer_info(quote_data.get("customer_id"))
         
@@ -77,56 +163,93 @@ class PricingOptimizerAgent:
         # In a real implementation, this would come from external data sources
         market_conditions = self._assess_market_conditions()
         
-        # Execute the LLM chain to optimize pricing
-        optimization_result = self.optimization_chain.run(
-            quote_details=json.dumps(quote_data, indent=2),
-            similar_projects_pricing=similar_projects_pricing,
-            customer_info=json.dumps(customer_info, indent=2) if customer_info else "No customer history available",
-            market_trend=market_conditions["materials_trend"],
-            competition_level=market_conditions["competition_level"]
-        )
-        
-        # Process the optimization result
+        return {
+            "quote_details": orjson.dumps(self._project_quote_for_prompt(quote_data), default=str).decode(),
+            "similar_projects_pricing": similar_projects_pricing,
+            "customer_info": orjson.dumps(
+                {key: customer_info[key] for key in self.PROMPT_CUSTOMER_FIELDS if key in customer_info}
+            ).decode() if customer_info else "No customer history available",
+            "market_trend": market_conditions["materials_trend"],
+            "competition_level": market_conditions["competition_level"]
+        }
+    
+    def _project_quote_for_prompt(self, quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reduce a quote to the fields the optimization prompt needs.
+        """
+        return {key: quote_data[key] for key in self.PROMPT_QUOTE_FIELDS if key in quote_data}
+    
+    def _parse_optimization(self, optimization_result: str) -> Dict[str, Any]:
+        """
+        Process the raw optimization result into recommendations.
+        """
         try:
-            optimization_recommendations = json.loads(optimization_result)
-        except json.JSONDecodeError:
+            return orjson.loads(optimization_result)
+        except orjson.JSONDecodeError:
             self.logger.error("Failed to parse optimization result as JSON")
-            optimization_recommendations = {
+            return {
                 "raw_recommendations": optimization_result,
                 "error": "Failed to structure recommendations properly"
             }
-        
-        # Apply the optimizations to the quote
-        optimized_quote = self._apply_optimizations(quote_data, optimization_recommendations)
-        
-        return optimized_quote
     
     def deep_optimize(self, quote_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Perform a deeper optimization analysis on an existing quote.
         """
-        self.logger.info(f"Performing deep optimization for quote: {quote_data.get('quote_id')}")
+        self.logger.info("Performing deep optimization for quote: %s", quote_data.get("quote_id"))
         
         # Find similar projects that have been successful
         similar_successful_projects = self._find_successful_similar_projects(quote_data)
+        if not similar_successful_projects and quote_data.get("total_price"):
+            return self._skip_optimization(quote_data)
         
         # Run the standard optimization with focused data
         return self.optimize_pricing(quote_data, similar_successful_projects)
     
+    async def adeep_optimize(self, quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of deep_optimize.
+        """
+        self.logger.info("Performing deep optimization for quote: %s", quote_data.get("quote_id"))
+        
+        similar_successful_projects = await asyncio.to_thread(self._find_successful_similar_projects, quote_data)
+        if not similar_successful_projects and quote_data.get("total_price"):
+            return self._skip_optimization(quote_data)
+        
+        return await self.aoptimize_pricing(quote_data, similar_successful_projects)
+    
+    def _skip_optimization(self, quote_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return the quote unchanged when there is no successful history to
+        optimize against; an LLM call would have nothing to work from.
+        """
+        self.logger.info("Skipping deep optimization for quote %s: insufficient history", quote_data.get("quote_id"))
+        return {
+            **quote_data,
+            "optimization": {
+                "recommendations": {"note": "insufficient history"},
+                "original_price": quote_data.get("total_price"),
+                "price_change_percentage": 0,
+                "skipped": True
+            }
+        }
+    
     def update_models_with_feedback(self, feedback_data: Dict[str, Any]) -> None:
         """
         Update optimization models based on quote feedback.
         In a production system, this would update ML models or heuristics.
         """
-        self.logger.info(f"Updating models with feedback for quote: {feedback_data['quote_id']}")
+        self.logger.info("Updating models with feedback for quote: %s", feedback_data["quote_id"])
         
         # In a real implementation, this would update ML models or parameters
         # For this POC, we'll just log that it happened
-        self.logger.info(f"Feedback processed: Quote was {'accepted' if feedback_data['accepted'] else 'rejected'}")
+        self.logger.info("Feedback processed: Quote was %s", "accepted" if feedback_data["accepted"] else "rejected")
         
-    def _get_customer_info(self, customer_id: str) -> Dict[str, Any]:
+    def _get_customer_info(self, customer_id: str, include_history: bool = False) -> Dict[str, Any]:
         """
-        Retrieve customer information and quote history.
+        Retrieve customer information and quote metrics.
+        The quote history is only loaded when include_history is set, as summary
+        rows (id, project, price, timestamp, status) rather than full quotes.
         """
         if not customer_id:
             return {}
@@ -136,21 +259,15 @@ class PricingOptimizerAgent:
         if not customer_data:
             return {}
         
-        # Get customer's quote history
-        quote_history = self.structured_db.get_customer_quotes(customer_id)
+        # Customer metrics are aggregated in SQL rather than over the full history
+        stats = self.structured_db.get_customer_stats(customer_id)
+        if stats["total_projects"]:
+            customer_data["win_rate"] = stats["accepted_projects"] / stats["total_projects"]
+            customer_data["avg_project_size"] = stats["avg_project_size"]
+            customer_data["total_projects"] = stats["total_projects"]
         
-        # Calculate customer metrics
-        if quote_history:
-            # Calculate win rate
-            statuses = [q.get("status", "pending") for q in quote_history]
-            win_rate = statuses.count("accepted") / len(statuses) if statuses else 0
-            
-            # Calculate average project size
-            avg_project_size = sum(q.get("total_price", 0) for q in quote_history) / len(quote_history)
-            
-            customer_data["win_rate"] = win_rate
-            customer_data["avg_project_size"] = avg_project_size
-            customer_data["total_projects"] = len(quote_history)
+        if include_history:
+            customer_data["quote_history"] = self.structured_db.get_customer_quote_summaries(customer_id)
         
         return customer_data
     
@@ -161,21 +278,27 @@ class PricingOptimizerAgent:
         if not similar_projects:
             return "No similar projects found in our database."
         
-        formatted_data = []
-        for idx, project in enumerate(similar_projects, 1):
-            project_info = f"Project {idx}: {project.get('project_name', 'Unnamed')}\n"
-            project_info += f"  - Total Price: ${project.get('total_price', 0):,.2f}\n"
-            project_info += f"  - Status: {project.get('status', 'unknown')}\n"
-            
-            if "breakdown" in project:
-                project_info += "  - Cost Breakdown:\n"
-                for category, amount in project["breakdown"].items():
-                    project_info += f"    * {category.capitalize()}: ${amount:,.2f}\n"
-            
-            formatted_data.append(project_info)
+        # Reduce each project to the hashable fields the rendering uses, so
+        # repeated project lists reuse the rendered text
+        get = dict.get
+        rows = tuple(
+            (
+                get(project, "project_name", "Unnamed"),
+                get(project, "total_price"),
+                get(project, "status", "unknown"),
+                get(project, "customer_satisfied"),
+                tuple(project["breakdown"].items()) if "breakdown" in project else None
+            )
+            for project in similar_projects
+        )
         
-        return "\n".join(formatted_data)
+        try:
+            return _render_similar_projects(rows)
+        except TypeError:
+            # Nested breakdown values aren't hashable; render without caching
+            return _render_similar_projects.__wrapped__(rows)
     
+    @cached(TTLCache(maxsize=1, ttl=300), key=lambda self: "market_conditions")
     def _assess_market_conditions(self) -> Dict[str, str]:
         """
         Assess current market conditions affecting pricing decisions.
@@ -194,27 +317,21 @@ class PricingOptimizerAgent:
         """
         Apply optimization recommendations to the quote.
         """
-        # Create a copy of the original quote to avoid modifying it
+        # Copy the original quote, and the breakdown that gets modified, so the
+        # original quote is left untouched
         optimized_quote = dict(quote_data)
+        if "breakdown" in quote_data:
+            optimized_quote["breakdown"] = dict(quote_data["breakdown"])
         
-        # Apply line item adjustments if provided
+        # Apply line item adjustments if provided, updating existing items or adding new ones
         if "line_item_adjustments" in recommendations:
-            if "breakdown" not in optimized_quote:
-                optimized_quote["breakdown"] = {}
-                
+            breakdown = optimized_quote.setdefault("breakdown", {})
+            
             for item, adjustment in recommendations["line_item_adjustments"].items():
-                if item in optimized_quote["breakdown"]:
-                    # Update existing breakdown item
-                    if isinstance(adjustment, dict) and "value" in adjustment:
-                        optimized_quote["breakdown"][item] = adjustment["value"]
-                    elif isinstance(adjustment, (int, float)):
-                        optimized_quote["breakdown"][item] = adjustment
-                else:
-                    # Add new breakdown item
-                    if isinstance(adjustment, dict) and "value" in adjustment:
-                        optimized_quote["breakdown"][item] = adjustment["value"]
-                    elif isinstance(adjustment, (int, float)):
-                        optimized_quote["breakdown"][item] = adjustment
+                if isinstance(adjustment, dict) and "value" in adjustment:
+                    breakdown[item] = adjustment["value"]
+                elif isinstance(adjustment, (int, float)):
+                    breakdown[item] = adjustment
         
         # Update total price if provided
         if "recommended_total_price" in recommendations:
@@ -222,7 +339,7 @@ class PricingOptimizerAgent:
             
         # Otherwise recalculate total from breakdown
         elif "breakdown" in optimized_quote:
-            optimized_quote["total_price"] = sum(optimized_quote["breakdown"].values())
+            optimized_quote["total_price"] = math.fsum(optimized_quote["breakdown"].values())
         
         # Add optimization metadata
         optimized_quote["optimization"] = {
@@ -238,33 +355,29 @@ class PricingOptimizerAgent:
         """
         Find similar projects that were successfully won.
         """
-        # This would normally use more sophisticated similarity search
-        # For demo purposes, we'll simulate this with structured DB queries
-        
-        # Get projects in the same price range
+        # Look for accepted quotes of a similar size that are semantically closest
         price_min = quote_data.get("total_price", 0) * 0.8
         price_max = quote_data.get("total_price", 0) * 1.2
         
-        try:
-            conn = self.structured_db.db_path
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                """
-                SELECT quote_data
-                FROM quotes
-                WHERE total_price BETWEEN ? AND ?
-                AND status = 'accepted'
-                ORDER BY timestamp DESC
-                LIMIT 5
-                """,
-                (price_min, price_max)
-            )
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            return [json.loads(row[0]) for row in results]
-        except Exception as e:
-            self.logger.error(f"Error finding successful projects: {str(e)}")
-            return []
\ No newline at end of file
+        cache_key = (quote_data.get("quote_id"), int(quote_data.get("total_price", 0) // 1000))
+        with self._successful_lock:
+            cached_projects = self._successful_cache.get(cache_key)
+        if cached_projects is not None:
+            return cached_projects
+        
+        quote_ids = self.vector_db.query_similar_successful(
+            self.vector_db.quote_search_text(quote_data),
+            k=6,
+            price_min=price_min,
+            price_max=price_max
+        )
+        quote_ids = [quote_id for quote_id in quote_ids if quote_id != quote_data.get("quote_id")][:5]
+        projects = self.structured_db.get_quotes(quote_ids)
+        
+        # Fall back to the most recent accepted quotes in the price range
+        if not projects:
+            projects = self.structured_db.get_successful_quotes_in_range(price_min, price_max, limit=5)
+        
+        with self._successful_lock:
+            self._successful_cache[cache_key] = projects
+        return projects
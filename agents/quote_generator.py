@@ -1,12 +1,19 @@
 # agents/quote_generator.py
-from langchain.chat_models import ChatOpenAI
 from langchain.chains import LLMChain
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Tuple
+from collections import Counter
+import asyncio
 import uuid
 from datetime import datetime
 import logging
-import os
+
+import numpy as np
+import orjson
+
+from agents._llm import get_llm
+from agents._llm_cache import ChainResponseCache
+from agents._similar_projects import SimilarProjectsBatch, _to_float
 
 class QuoteGeneratorAgent:
     """
@@ -14,37 +21,20 @@ class QuoteGeneratorAgent:
     based on project requirements, historical data, and business rules.
     """
     
-    def __init__(self, vector_db, structured_db):
+    def __init__(self, vector_db, structured_db, llm=None):
         self.vector_db = vector_db
         self.structured_db = structured_db
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo",
-            temperature=0.1,
-            api_key=os.environ.get("OPENAI_API_KEY")
-        )
+        self.llm = llm or get_llm("gpt-4-turbo", 0.1)
         self.logger = logging.getLogger(__name__)
         
-        # Initialize quote generation prompt template
-        self.quote_prompt = ChatPromptTemplate.from_template("""
+        # Initialize quote generation prompt template. The static instructions form
+        # the system message and the per-request details come last, so every call
+        # shares the same prompt prefix and can hit the provider's prompt cache
+        quote_instructions = """
             You are an expert manufacturing quote generator with years of experience.
             
-            ## Project Details
-            Customer: {customer_id}
-            Project Name: {project_name}
-            Description: {project_description}
-            Materials Required: {materials}
-            Labor Hours (estimated): {labor_hours}
-            Deadline: {deadline}
-            Special Requirements: {special_requirements}
-            
-            ## Historical Data Insights
-            Similar Projects Analysis: {similar_projects_analysis}
-            
-            ## Business Rules
-            Customer-Specific Rules: {business_rules}
-            
             ## Instructions
-            Generate a detailed manufacturing quote with the following:
+            Generate a detailed manufacturing quote for the project you are given, with the following:
             1. Line-item breakdown of all materials with quantities and unit prices
             2. Labor costs with hourly rates and estimated hours
             3. Equipment/machinery costs
@@ -56,11 +46,33 @@ class QuoteGeneratorAgent:
             
             Format your response as a structured JSON object that can be easily processed.
             Include a confidence score (0-100) for your quote based on the quality of available information.
-        """)
+            """
+        self.quote_prompt = ChatPromptTemplate.from_messages([
+            ("system", quote_instructions),
+            ("human", """
+            ## Business Rules
+            Customer-Specific Rules: {business_rules}
+            
+            ## Historical Data Insights
+            Similar Projects Analysis: {similar_projects_analysis}
+            
+            ## Project Details
+            Customer: {customer_id}
+            Project Name: {project_name}
+            Description: {project_description}
+            Materials Required: {materials}
+            Labor Hours (estimated): {labor_hours}
+            Deadline: {deadline}
+            Special Requirements: {special_requirements}
+            """)
+        ])
         
-        # Create the chain
+        # Create the chains
         self.quote_chain = LLMChain(llm=self.llm, prompt=self.quote_prompt)
         
+        # Serve exact repeats of a quote prompt from cache
+        self.response_cache = ChainResponseCache()
+        
     def generate_quote(self, 
                        request_data: Dict[str, Any], 
                        project_analysis: Dict[str, Any],
@@ -69,90 +81,175 @@ class QuoteGeneratorAgent:
         """
         Generate a comprehensive quote based on project requirements and analysis.
         """
-        self.logger.info(f"Generating quote for project: {request_data['project_name']}")
+        self.logger.info("Generating quote for project: %s", request_data["project_name"])
         
         # Prepare similar projects analysis summary
         similar_projects_summary = self._summarize_similar_projects(similar_projects)
         
         # Execute the LLM chain to generate the quote
-        quote_result = self.quote_chain.run(
-            customer_id=request_data["customer_id"],
-            project_name=request_data["project_name"],
-            project_description=request_data["project_description"],
-            materials=request_data["materials"],
-            labor_hours=request_data.get("labor_hours", "Not specified"),
-            deadline=request_data.get("deadline", "Not specified"),
-            special_requirements=request_data.get("special_requirements", "None"),
-            similar_projects_analysis=similar_projects_summary,
-            business_rules=business_rules
+        quote_result = self.response_cache.run(
+            self.quote_chain,
+            **self._quote_inputs(request_data, similar_projects_summary, business_rules)
+        )
+        
+        final_quote = self._build_quote(request_data, self._parse_quote_result(quote_result))
+        
+        # Store the quote in the database
+        self._store_quote(final_quote)
+        
+        return final_quote
+    
+    async def agenerate_quote(self,
+                              request_data: Dict[str, Any],
+                              project_analysis: Dict[str, Any],
+                              similar_projects: List[Dict[str, Any]],
+                              business_rules: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of generate_quote.
+        """
+        self.logger.info("Generating quote for project: %s", request_data["project_name"])
+        
+        similar_projects_summary = self._summarize_similar_projects(similar_projects)
+        structured_quote = await self._agenerate_structured_quote(
+            self._quote_inputs(request_data, similar_projects_summary, business_rules)
+        )
+        
+        final_quote = self._build_quote(request_data, structured_quote)
+        
+        # SQLite writes block, so store the quote from a worker thread
+        await asyncio.to_thread(self._store_quote, final_quote)
+        
+        return final_quote
+    
+    async def astream_quote(self,
+                            request_data: Dict[str, Any],
+                            project_analysis: Dict[str, Any],
+                            similar_projects: List[Dict[str, Any]],
+                            business_rules: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Generate a quote while streaming the model output. Yields ("token", text)
+        for each chunk, then ("quote", final_quote) once the full output is
+        parsed and stored.
+        """
+        self.logger.info("Streaming quote for project: %s", request_data["project_name"])
+        
+        similar_projects_summary = self._summarize_similar_projects(similar_projects)
+        messages = self.quote_prompt.format_messages(
+            **self._quote_inputs(request_data, similar_projects_summary, business_rules)
         )
         
-        # Process and structure the quote result (assuming the LLM returns JSON-formatted string)
+        chunks = []
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield "token", chunk.content
+        
+        final_quote = self._build_quote(request_data, self._parse_quote_result("".join(chunks)))
+        await asyncio.to_thread(self._store_quote, final_quote)
+        
+        yield "quote", final_quote
+    
+    async def _agenerate_structured_quote(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate one structured quote from quote prompt variables.
+        """
+        quote_result = await self.response_cache.arun(self.quote_chain, **inputs)
+        return self._parse_quote_result(quote_result)
+    
+    def _quote_inputs(self,
+                      request_data: Dict[str, Any],
+                      similar_projects_summary: str,
+                      business_rules: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the quote prompt variables for a request.
+        """
+        return {
+            "customer_id": request_data["customer_id"],
+            "project_name": request_data["project_name"],
+            "project_description": request_data["project_description"],
+            "materials": request_data["materials"],
+            "labor_hours": request_data.get("labor_hours", "Not specified"),
+            "deadline": request_data.get("deadline", "Not specified"),
+            "special_requirements": request_data.get("special_requirements", "None"),
+            "similar_projects_analysis": similar_projects_summary,
+            "business_rules": business_rules
+        }
+    
+    def _parse_quote_result(self, quote_result: str) -> Dict[str, Any]:
+        """
+        Process and structure the quote result (assuming the LLM returns JSON-formatted string).
+        """
         try:
-            import json
-            structured_quote = json.loads(quote_result)
-        except json.JSONDecodeError:
+            return orjson.loads(quote_result)
+        except orjson.JSONDecodeError:
             self.logger.error("Failed to parse quote result as JSON")
             # Fallback to raw result with minimal structure
-            structured_quote = {
+            return {
                 "raw_quote": quote_result,
                 "error": "Failed to structure quote properly"
             }
-        
+    
+    def _build_quote(self, request_data: Dict[str, Any], structured_quote: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add quote metadata to a structured quote.
+        """
         # Add metadata
         quote_id = str(uuid.uuid4())
         timestamp = datetime.now().isoformat()
         
-        final_quote = {
+        return {
             "quote_id": quote_id,
             "timestamp": timestamp,
             "customer_id": request_data["customer_id"],
             "project_name": request_data["project_name"],
             **structured_quote
         }
-        
-        # Store the quote in the database
-        self._store_quote(final_quote)
-        
-        return final_quote
     
     def _summarize_similar_projects(self, similar_projects: List[Dict[str, Any]]) -> str:
         """
         Summarize insights from similar projects to inform the quote generation.
+        The statistics are computed directly rather than asked of the LLM.
         """
         if not similar_projects:
             return "No similar projects found in historical data."
         
-        # Use LLM to generate a concise summary of similar projects
-        summary_prompt = ChatPromptTemplate.from_template("""
-            Analyze the following historical projects similar to the current project:
-            
-            {similar_projects}
-            
-            Provide a concise summary of insights that would be relevant for generating 
-            a new quote, including:
-            - Average cost ranges for materials and labor
-            - Common challenges and how they affected pricing
-            - Typical profit margins applied
-            - Any patterns in customer satisfaction or project outcomes
-            
-            Format as a concise bulleted list of key insights.
-        """)
-        
-        summary_chain = LLMChain(llm=self.llm, prompt=summary_prompt)
-        
-        # Convert similar projects to a string representation
-        projects_str = "\n\n".join([
-            f"Project: {p.get('project_name')}\n"
-            f"Final Cost: ${p.get('total_price')}\n"
-            f"Profit Margin: {p.get('profit_margin')}%\n"
-            f"Customer Satisfied: {p.get('customer_satisfied', 'Unknown')}\n"
-            f"Key Challenges: {p.get('challenges', 'None recorded')}"
-            for p in similar_projects
-        ])
+        batch = SimilarProjectsBatch.from_records(similar_projects)
+        parts = [f"n={len(batch)}"]
+        
+        prices = batch.known_prices()
+        if prices.size:
+            p25, p50, p75 = np.percentile(prices, [25, 50, 75])
+            parts.append(f"price P25/P50/P75=${p25:,.0f}/${p50:,.0f}/${p75:,.0f}")
+            parts.append(f"mean price ${prices.mean():,.0f}")
+        
+        # Cost ranges for the main breakdown categories
+        for category in ("materials", "labor"):
+            costs = np.fromiter(
+                (_to_float((p.get("breakdown") or {}).get(category)) for p in similar_projects),
+                dtype=np.float64,
+                count=len(similar_projects)
+            )
+            costs = costs[~np.isnan(costs)]
+            if costs.size:
+                parts.append(f"{category} ${costs.min():,.0f}-${costs.max():,.0f} (mean ${costs.mean():,.0f})")
+        
+        margins = batch.margins[~np.isnan(batch.margins)]
+        if margins.size:
+            parts.append(f"mean margin {margins.mean():.1f}%")
+        
+        parts.append(f"won or satisfied {int(batch.accepted.sum())} of {len(batch)}")
+        
+        # Most common recorded challenges
+        challenges = Counter()
+        for project in similar_projects:
+            recorded = project.get("challenges")
+            if isinstance(recorded, str):
+                recorded = [recorded]
+            challenges.update(c for c in recorded or () if c)
+        if challenges:
+            parts.append(f"top challenges: {', '.join(c for c, _ in challenges.most_common(3))}")
         
-        summary = summary_chain.run(similar_projects=projects_str)
-        return summary
+        return "; ".join(parts)
     
     def _store_quote(self, quote_data: Dict[str, Any]) -> None:
         """
@@ -160,8 +257,8 @@ class QuoteGeneratorAgent:
         """
         try:
             self.structured_db.store_quote(quote_data)
-            self.logger.info(f"Quote {quote_data['quote_id']} stored successfully")
+            self.logger.info("Quote %s stored successfully", quote_data["quote_id"])
         except Exception as e:
-            self.logger.error(f"Failed to store quote: {str(e)}")
+            self.logger.error("Failed to store quote: %s", e)
             # Continue execution - this is non-critical
             pass
\ No newline at end of file
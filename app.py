@@ -2,13 +2,17 @@
 import os
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import uvicorn
 from datetime import datetime
 import json
+import orjson
 
 # Import agent system
+from agents._llm import get_llm
 from agents.coordinator import CoordinatorAgent
 from agents.data_analyst import DataAnalystAgent
 from agents.quote_generator import QuoteGeneratorAgent
@@ -30,16 +34,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize databases
+# Initialize databases (these seed sample data when SEED_DB=true)
 vector_db = VectorStore()
 structured_db = StructuredDB()
 
+# Initialize shared chat models; agents share their HTTP connection pools
+analysis_llm = get_llm("gpt-4-turbo", 0.2)
+pricing_llm = get_llm("gpt-4-turbo", 0.1)
+
 # Initialize agents
-coordinator = CoordinatorAgent()
-data_analyst = DataAnalystAgent(vector_db, structured_db)
-quote_generator = QuoteGeneratorAgent(vector_db, structured_db)
-pricing_optimizer = PricingOptimizerAgent(vector_db, structured_db)
-knowledge_agent = KnowledgeBaseAgent(vector_db)
+coordinator = CoordinatorAgent(analysis_llm)
+data_analyst = DataAnalystAgent(vector_db, structured_db, analysis_llm)
+quote_generator = QuoteGeneratorAgent(vector_db, structured_db, pricing_llm)
+pricing_optimizer = PricingOptimizerAgent(vector_db, structured_db, pricing_llm)
+knowledge_agent = KnowledgeBaseAgent(vector_db, analysis_llm)
 
 # Connect agents to coordinator
 coordinator.register_agents(
@@ -49,6 +57,14 @@ coordinator.register_agents(
     knowledge_agent=knowledge_agent
 )
 
+def prepare_data():
+    """
+    One-shot startup work, run once in the launching process before the
+    server starts rather than once per worker: make sure every accepted
+    quote is in the similar-successful-quotes index.
+    """
+    vector_db.index_successful_quotes(structured_db.get_accepted_quotes())
+
 # Define request models
 class QuoteRequest(BaseModel):
     customer_id: str
@@ -73,15 +89,40 @@ async def root():
 async def generate_quote(request: QuoteRequest):
     try:
         # Process the quote request through the coordinator agent
-        quote_result = coordinator.process_quote_request(request.dict())
+        quote_result = await coordinator.process_quote_request(request.model_dump())
         return quote_result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate-quote/stream")
+async def generate_quote_stream(request: QuoteRequest):
+    async def events():
+        # Headers are already sent once streaming starts, so errors become an event
+        try:
+            async for event in coordinator.astream_quote_request(request.model_dump()):
+                yield orjson.dumps(event, default=str) + b"\n"
+        except Exception as e:
+            yield orjson.dumps({"event": "error", "detail": str(e)}) + b"\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/analyze-project/stream")
+async def analyze_project_stream(request: QuoteRequest):
+    async def events():
+        # Each analysis section is sent as soon as the model finishes it
+        try:
+            async for name, value in data_analyst.astream_analysis(request.model_dump()):
+                yield orjson.dumps({"event": "field", "name": name, "value": value}, default=str) + b"\n"
+            yield orjson.dumps({"event": "done"}) + b"\n"
+        except Exception as e:
+            yield orjson.dumps({"event": "error", "detail": str(e)}) + b"\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @app.post("/optimize-quote/{quote_id}")
 async def optimize_quote(quote_id: str):
     try:
-        optimization_result = coordinator.optimize_quote(quote_id)
+        optimization_result = await coordinator.aoptimize_quote(quote_id)
         return optimization_result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -89,8 +130,9 @@ async def optimize_quote(quote_id: str):
 @app.post("/quote-feedback")
 async def submit_feedback(feedback: FeedbackRequest):
     try:
-        # Process feedback through coordinator to improve future quotes
-        feedback_result = coordinator.process_feedback(feedback.dict())
+        # Process feedback through coordinator to improve future quotes; it blocks
+        # on SQLite and the vector store, so keep it off the event loop
+        feedback_result = await run_in_threadpool(coordinator.process_feedback, feedback.model_dump())
         return feedback_result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -98,10 +140,28 @@ async def submit_feedback(feedback: FeedbackRequest):
 @app.get("/market-insights")
 async def get_market_insights():
     try:
-        insights = data_analyst.get_market_insights()
+        insights = await run_in_threadpool(data_analyst.get_market_insights)
         return insights
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Seeding already ran when the databases were initialized above; index once
+    # here, and keep worker processes (which re-import the app) from seeding again
+    prepare_data()
+    os.environ["SEED_DB"] = "false"
+    
+    # uvloop/httptools are picked up automatically when installed; auto-reload
+    # is for development only and can't be combined with multiple workers.
+    # Response caches, batching and in-flight request maps are per process, so
+    # a single worker is the default; raise WEB_CONCURRENCY only deliberately
+    dev_mode = os.environ.get("DEV") == "1"
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=1 if dev_mode else int(os.environ.get("WEB_CONCURRENCY", "1")),
+        reload=dev_mode
+    )
\ No newline at end of file
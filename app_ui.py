@@ -1,11 +1,10 @@
 # app_ui.py
 import streamlit as st
-import requests
 import json
+import orjson
+import numpy as np
 import pandas as pd
 import time
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import random
 
@@ -20,6 +19,293 @@ st.set_page_config(
 # Constants
 API_URL = "http://localhost:8000"  # URL of FastAPI backend
 
+# Red-yellow-green gradient for win rate bars, resolved once instead of per chart
+RYG_SCALE = [(0.0, "#d62728"), (0.5, "#ffdd00"), (1.0, "#2ca02c")]
+
+# Shared generator for vectorized mock data
+rng = np.random.default_rng(0)
+
+
+@st.cache_data(ttl=3600)
+def _dashboard_quotes_df():
+    """
+    Mock daily quote volume for the last 90 days, with the 7-day moving average
+    precomputed so reruns only hit the cache.
+    """
+    dates = pd.date_range(end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=90).strftime("%Y-%m-%d").to_numpy()
+    quotes_data = {
+        "date": dates,
+        "total_quotes": rng.integers(2, 9, size=len(dates)),
+        "won_quotes": rng.integers(1, 6, size=len(dates))
+    }
+    quotes_df = pd.DataFrame(quotes_data)
+    
+    # Calculate 7-day moving average from a running sum (float32 halves the payload)
+    vals = quotes_df["total_quotes"].to_numpy(dtype=np.float32)
+    csum = np.cumsum(np.insert(vals, 0, 0.0))
+    avg7 = (csum[7:] - csum[:-7]) / np.float32(7.0)
+    quotes_df["7d_avg"] = np.concatenate([np.full(6, np.nan, dtype=np.float32), avg7])
+    return quotes_df
+
+@st.cache_data(ttl=3600)
+def _industry_df():
+    """
+    Mock win rate and quote count per industry.
+    """
+    industry_data = {
+        "industry": ["Aerospace", "Automotive", "Electronics", "Medical", "Energy", "Construction"],
+        "win_rate": [72.4, 58.9, 67.2, 76.8, 54.3, 61.5],
+        "quote_count": [58, 76, 43, 32, 27, 41]
+    }
+    return pd.DataFrame(industry_data)
+
+@st.cache_data(ttl=3600)
+def _recent_df():
+    """
+    Mock recent quote activity for the dashboard table.
+    """
+    return pd.DataFrame({
+        "id": ["Q-2025-0387", "Q-2025-0386", "Q-2025-0385", "Q-2025-0384", "Q-2025-0383"],
+        "customer": ["Aerospace Dynamics", "MediTech Solutions", "GreenEnergy Corp", "Industrial Automation", "Precision Parts Inc"],
+        "amount": ["$287,500", "$142,800", "$98,750", "$215,300", "$67,200"],
+        "status": pd.Categorical(["Won", "Pending", "Won", "Lost", "Won"], categories=["Won", "Lost", "Pending"]),
+        "date": pd.to_datetime(["2025-04-05", "2025-04-04", "2025-04-03", "2025-04-02", "2025-04-01"])
+    })
+
+@st.cache_data(ttl=3600)
+def _material_costs_df():
+    """
+    Mock quarterly cost index per material: a shared random walk from 1.0 with
+    per-material noise, generated in one vectorized pass.
+    """
+    materials = ["Steel", "Aluminum", "Copper", "Titanium", "Plastics", "Electronics"]
+    quarters = ["Q2 2024", "Q3 2024", "Q4 2024", "Q1 2025", "Q2 2025 (Forecast)"]
+    
+    base = np.concatenate([[1.0], np.cumprod(1 + rng.uniform(-0.05, 0.08, len(quarters) - 1))])
+    noise = 1 + rng.uniform(-0.1, 0.1, (len(quarters), len(materials)))
+    return pd.DataFrame(base[:, np.newaxis] * noise, index=quarters, columns=materials)
+
+@st.cache_data(ttl=3600)
+def _price_trends_df():
+    """
+    Mock monthly price index per industry for the last 12 months: a per-industry
+    baseline and trend, compounded with monthly noise.
+    """
+    industries = ["Aerospace", "Automotive", "Electronics", "Medical", "Energy", "Construction"]
+    months = pd.date_range(end=pd.Timestamp.now() - pd.DateOffset(months=1), periods=12, freq="MS").strftime("%b %Y").to_numpy()
+    
+    baselines = rng.integers(80, 121, size=len(industries))
+    trends = rng.choice([0.02, -0.01, 0.01, 0.03, -0.02], size=len(industries))
+    noise = rng.uniform(-0.02, 0.02, (len(industries), len(months)))
+    prices = baselines[:, np.newaxis] * np.cumprod(1 + trends[:, np.newaxis] + noise, axis=1)
+    return pd.DataFrame(prices.T, index=months, columns=industries)
+
+@st.cache_resource
+def _plotly():
+    """
+    Import Plotly on first use by a chart, so pages without charts skip its import cost.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    from plotly_resampler import register_plotly_resampler
+    
+    # Serialize figures with orjson rather than the stdlib json encoder
+    pio.json.config.default_engine = "orjson"
+    
+    # Downsample long traces automatically so only the visible slice is sent to the browser
+    register_plotly_resampler(mode="auto", default_n_shown_samples=2000)
+    return px, go
+
+@st.cache_resource
+def _api_session():
+    """
+    Keep-alive HTTP session for backend calls, shared across reruns and sessions.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+def _style_status_col(col):
+    """
+    Background styling for a whole status column in one vectorized pass.
+    """
+    return np.where(
+        col.eq("Won"), "background-color: #d4edda; color: #155724",
+        np.where(col.eq("Lost"), "background-color: #f8d7da; color: #721c24",
+                 "background-color: #fff3cd; color: #856404")
+    )
+
+def _color_status_col(col):
+    """
+    Text colour for a whole status column in one vectorized pass.
+    """
+    return np.select(
+        [col.eq("Won"), col.eq("Lost"), col.eq("Pending")],
+        ["color: green", "color: red", "color: orange"],
+        default="color: black"
+    )
+
+# Figures are mutable, so they are cached as resources keyed on a content hash of the input frame
+_FRAME_HASH = {pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes()}
+
+@st.cache_resource(hash_funcs=_FRAME_HASH, max_entries=32)
+def _quote_volume_fig(quotes_df):
+    """
+    Daily quote volume bars with the 7-day moving average.
+    """
+    px, go = _plotly()
+    y_matrix = quotes_df[["total_quotes", "won_quotes"]].to_numpy()
+    
+    # The dates are consecutive days, so every trace is placed by the first date
+    # and a one-day step instead of each serializing all of the date labels
+    start, day_ms = quotes_df["date"].iloc[0], 24 * 60 * 60 * 1000
+    fig = go.Figure()
+    fig.add_bar(x0=start, dx=day_ms, y=y_matrix[:, 0], name="Total Quotes", marker_color="lightblue")
+    fig.add_bar(x0=start, dx=day_ms, y=y_matrix[:, 1], name="Won Quotes", marker_color="green")
+    fig.add_trace(go.Scattergl(x0=start, dx=day_ms, y=quotes_df["7d_avg"].to_numpy(), mode="lines", name="7-Day Avg", line=dict(color="darkblue", width=2)))
+
+    fig.update_layout(
+        title="Quote Volume (Last 90 Days)",
+        xaxis=dict(type="date", title="Date"),
+        yaxis_title="Number of Quotes",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        barmode="group"
+    )
+    return fig
+
+def _win_rate_count_fig(categories, win_rate, quote_count, range_color, title, category_label):
+    """
+    Win rate bars coloured on RYG_SCALE, with quote count as a line on a secondary
+    axis, laid out once with make_subplots.
+    """
+    px, go = _plotly()
+    from plotly.subplots import make_subplots
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(
+        go.Bar(
+            x=categories,
+            y=win_rate,
+            name="Win Rate (%)",
+            texttemplate="%{y}%",
+            marker=dict(
+                color=win_rate,
+                colorscale=RYG_SCALE,
+                cmin=range_color[0],
+                cmax=range_color[1],
+                colorbar=dict(title="Win Rate (%)", x=1.1)
+            ),
+            showlegend=False
+        ),
+        secondary_y=False
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=categories,
+            y=quote_count,
+            mode="lines+markers",
+            name="Quote Count",
+            line=dict(color="darkblue", width=2),
+            marker=dict(size=8)
+        ),
+        secondary_y=True
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title=category_label,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    fig.update_yaxes(title_text="Win Rate (%)", secondary_y=False)
+    fig.update_yaxes(title_text="Quote Count", showgrid=False, secondary_y=True)
+    return fig
+
+@st.cache_resource(hash_funcs=_FRAME_HASH, max_entries=32)
+def _industry_fig(industry_df):
+    """
+    Win rate by industry, with quote count on a secondary axis.
+    """
+    return _win_rate_count_fig(
+        industry_df["industry"], industry_df["win_rate"], industry_df["quote_count"],
+        (50, 80), "Win Rate by Industry", "Industry"
+    )
+
+@st.cache_resource(hash_funcs=_FRAME_HASH, max_entries=32)
+def _price_trends_fig(trends_df):
+    """
+    Monthly relative price index per industry.
+    """
+    px, go = _plotly()
+    fig = go.Figure()
+    for industry in trends_df.columns:
+        fig.add_trace(go.Scattergl(x=trends_df.index, y=trends_df[industry], mode="lines+markers", name=industry))
+    fig.update_layout(
+        title="Average Quote Prices by Industry (12-Month Trend)",
+        xaxis_title="Month",
+        yaxis_title="Relative Price Index (100 = Baseline)",
+        legend_title="Industry"
+    )
+    return fig
+
+@st.cache_resource(hash_funcs=_FRAME_HASH, max_entries=32)
+def _customer_scatter_fig(customer_df):
+    """
+    Customer portfolio bubble chart.
+    """
+    px, go = _plotly()
+    # Scatter plot of customers (WebGL bubble chart, sized by quote count)
+    fig = go.Figure(
+        go.Scattergl(
+            x=customer_df["avg_value"],
+            y=customer_df["win_rate"],
+            mode="markers",
+            text=customer_df["customer"],
+            customdata=customer_df[["quotes_ytd", "relationship_years"]],
+            hovertemplate=(
+                "<b>%{text}</b><br>Average Quote Value ($): %{x}<br>Win Rate (%): %{y}"
+                "<br>Number of Quotes YTD: %{customdata[0]}<br>Relationship Length (Years): %{customdata[1]}"
+                "<extra></extra>"
+            ),
+            marker=dict(
+                size=customer_df["quotes_ytd"],
+                sizemode="area",
+                sizeref=2.0 * customer_df["quotes_ytd"].max() / 60 ** 2,
+                color=customer_df["relationship_years"],
+                colorscale="Plasma",
+                showscale=True,
+                colorbar=dict(title="Relationship Length (Years)")
+            )
+        )
+    )
+    fig.update_layout(
+        title="Customer Portfolio Analysis",
+        xaxis_title="Average Quote Value ($)",
+        yaxis_title="Win Rate (%)"
+    )
+    return fig
+
+@st.cache_resource(hash_funcs=_FRAME_HASH, max_entries=32)
+def _material_costs_fig(materials_df):
+    """
+    Quarterly material cost index lines.
+    """
+    px, go = _plotly()
+    fig = go.Figure(data=[
+        go.Scattergl(x=materials_df.index, y=materials_df[material], name=material, mode="lines+markers")
+        for material in materials_df.columns
+    ])
+    fig.update_layout(
+        title="Material Cost Index Trends (Base 1.0 = Q2 2024)",
+        xaxis_title="Quarter",
+        yaxis_title="Cost Index",
+        legend_title="Material"
+    )
+    return fig
+
 # Initialize session state for demo mode
 if 'demo_mode' not in st.session_state:
     st.session_state.demo_mode = True
@@ -47,7 +333,9 @@ st.session_state.demo_mode = demo_mode
 if demo_mode:
     st.sidebar.info("🔄 Demo mode is enabled. API calls will be simulated with mock data.")
 
-if page == "Dashboard":
+# Each page is a fragment, so widget interactions inside a page rerun only that page
+@st.fragment
+def _render_dashboard():
     st.header("Quote Performance Dashboard")
     
     # Summary metrics
@@ -65,109 +353,37 @@ if page == "Dashboard":
     # Quotes over time chart
     st.subheader("Quote Activity")
     
-    # Generate mock data for chart
-    dates = [(datetime.now() - timedelta(days=x)).strftime("%Y-%m-%d") for x in range(90, 0, -1)]
-    quotes_data = {
-        "date": dates,
-        "total_quotes": [random.randint(2, 8) for _ in range(len(dates))],
-        "won_quotes": [random.randint(1, 5) for _ in range(len(dates))]
-    }
-    quotes_df = pd.DataFrame(quotes_data)
-    
-    # Calculate 7-day moving average
-    quotes_df["7d_avg"] = quotes_df["total_quotes"].rolling(7).mean()
+    # Mock data for chart (cached across reruns)
+    quotes_df = _dashboard_quotes_df()
     
     # Plot chart
-    fig = go.Figure()
-    fig.add_bar(x=quotes_df["date"], y=quotes_df["total_quotes"], name="Total Quotes", marker_color="lightblue")
-    fig.add_bar(x=quotes_df["date"], y=quotes_df["won_quotes"], name="Won Quotes", marker_color="green")
-    fig.add_scatter(x=quotes_df["date"], y=quotes_df["7d_avg"], name="7-Day Avg", line=dict(color="darkblue", width=2))
-    
-    fig.update_layout(
-        title="Quote Volume (Last 90 Days)",
-        xaxis_title="Date",
-        yaxis_title="Number of Quotes",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        barmode="overlay"
-    )
+    fig = _quote_volume_fig(quotes_df)
     
     st.plotly_chart(fig, use_container_width=True)
     
     # Quote win rate by industry
     st.subheader("Win Rate by Industry")
     
-    industry_data = {
-        "industry": ["Aerospace", "Automotive", "Electronics", "Medical", "Energy", "Construction"],
-        "win_rate": [72.4, 58.9, 67.2, 76.8, 54.3, 61.5],
-        "quote_count": [58, 76, 43, 32, 27, 41]
-    }
-    industry_df = pd.DataFrame(industry_data)
-    
-    # Create a modified version of the bar chart that properly shows quote count
-    fig = px.bar(
-        industry_df, 
-        x="industry", 
-        y="win_rate",
-        text=industry_df["win_rate"].apply(lambda x: f"{x}%"),
-        color="win_rate",
-        color_continuous_scale=["red", "yellow", "green"],
-        range_color=[50, 80],
-        labels={"win_rate": "Win Rate (%)", "industry": "Industry"}
-    )
-
-    # Add a secondary y-axis with a line for quote count
-    fig.add_trace(
-        go.Scatter(
-            x=industry_df["industry"],
-            y=industry_df["quote_count"],
-            mode="lines+markers",
-            name="Quote Count",
-            yaxis="y2",
-            line=dict(color="darkblue", width=2),
-            marker=dict(size=8)
-        )
-    )
-
-    # Update layout to include the secondary y-axis
-    fig.update_layout(
-        title="Win Rate by Industry",
-        yaxis=dict(title="Win Rate (%)"),
-        yaxis2=dict(
-            title="Quote Count",
-            overlaying="y",
-            side="right",
-            showgrid=False
-        ),
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
+    industry_df = _industry_df()
+    
+    fig = _industry_fig(industry_df)
     st.plotly_chart(fig, use_container_width=True)
     
     # Recent activity
     st.subheader("Recent Quote Activity")
     
-    recent_quotes = [
-        {"id": "Q-2025-0387", "customer": "Aerospace Dynamics", "amount": "$287,500", "status": "Won", "date": "2025-04-05"},
-        {"id": "Q-2025-0386", "customer": "MediTech Solutions", "amount": "$142,800", "status": "Pending", "date": "2025-04-04"},
-        {"id": "Q-2025-0385", "customer": "GreenEnergy Corp", "amount": "$98,750", "status": "Won", "date": "2025-04-03"},
-        {"id": "Q-2025-0384", "customer": "Industrial Automation", "amount": "$215,300", "status": "Lost", "date": "2025-04-02"},
-        {"id": "Q-2025-0383", "customer": "Precision Parts Inc", "amount": "$67,200", "status": "Won", "date": "2025-04-01"}
-    ]
-    
-    # Create a DataFrame for the recent quotes
-    recent_df = pd.DataFrame(recent_quotes)
+    recent_df = _recent_df()
     
     # Apply styling to the status column
-    def style_status(val):
-        if val == "Won":
-            return "background-color: #d4edda; color: #155724"
-        elif val == "Lost":
-            return "background-color: #f8d7da; color: #721c24"
-        else:
-            return "background-color: #fff3cd; color: #856404"
-    
-    st.dataframe(recent_df.style.map(style_status, subset=["status"]), use_container_width=True)
+    st.dataframe(
+        recent_df.style
+        .format({"date": "{:%Y-%m-%d}"})
+        .apply(_style_status_col, subset=["status"]),
+        use_container_width=True
+    )
 
-elif page == "Generate Quote":
+@st.fragment
+def _render_generate_quote():
     st.header("Generate New Quote")
     
     # Customer selection
@@ -218,46 +434,29 @@ elif page == "Generate Quote":
     if "materials" not in st.session_state:
         st.session_state.materials = [{"name": "", "quantity": 1, "unit": "units"}]
     
-    # Function to add a new material row
-    def add_material():
-        st.session_state.materials.append({"name": "", "quantity": 1, "unit": "units"})
-    
-    # Function to remove a material row
-    def remove_material(index):
-        st.session_state.materials.pop(index)
-    
-    # Display materials table
-    for i, material in enumerate(st.session_state.materials):
-        col1, col2, col3, col4 = st.columns([3, 1, 1, 0.5])
-        
-        with col1:
-            st.session_state.materials[i]["name"] = st.text_input(
-                "Material Name", 
-                value=material["name"], 
-                key=f"mat_name_{i}"
-            )
-        
-        with col2:
-            st.session_state.materials[i]["quantity"] = st.number_input(
-                "Quantity", 
-                min_value=1, 
-                value=material["quantity"], 
-                key=f"mat_qty_{i}"
-            )
-        
-        with col3:
-            st.session_state.materials[i]["unit"] = st.selectbox(
-                "Unit", 
-                ["units", "kg", "lbs", "m", "ft", "sqm", "sqft", "hours"],
-                index=["units", "kg", "lbs", "m", "ft", "sqm", "sqft", "hours"].index(material["unit"]),
-                key=f"mat_unit_{i}"
+    # Editable materials table; rows are added/removed in the editor itself.
+    # The seed rows are left untouched because the editor tracks edits against them.
+    edited_materials = st.data_editor(
+        pd.DataFrame(st.session_state.materials, columns=["name", "quantity", "unit"]),
+        num_rows="dynamic",
+        column_config={
+            "name": st.column_config.TextColumn("Material Name"),
+            "quantity": st.column_config.NumberColumn("Quantity", min_value=1, step=1, default=1),
+            "unit": st.column_config.SelectboxColumn(
+                "Unit",
+                options=["units", "kg", "lbs", "m", "ft", "sqm", "sqft", "hours"],
+                default="units"
             )
-        
-        with col4:
-            if i > 0:  # Don't allow removing the first row
-                st.button("🗑️", key=f"remove_{i}", on_click=remove_material, args=(i,))
-    
-    st.button("Add Material", on_click=add_material)
+        },
+        use_container_width=True,
+        key="materials_editor"
+    )
+    materials = (
+        edited_materials
+        .fillna({"name": "", "quantity": 1, "unit": "units"})
+        .astype({"quantity": int})
+        .to_dict("records")
+    )
     
     # Generate quote button
     if st.button("Generate Quote"):
@@ -315,16 +514,16 @@ elif page == "Generate Quote":
                     "customer_id": selected_customer.split(" (")[1][:-1] if "(" in selected_customer else "NEW001",
                     "project_name": project_name,
                     "project_description": project_description,
-                    "materials": st.session_state.materials,
+                    "materials": materials,
                     "labor_hours": labor_hours,
                     "deadline": deadline.isoformat(),
                     "special_requirements": special_requirements
                 }
                 
-                response = requests.post(f"{API_URL}/generate-quote", json=payload)
+                response = _api_session().post(f"{API_URL}/generate-quote", data=orjson.dumps(payload), timeout=30)
                 
                 if response.status_code == 200:
-                    st.session_state.current_quote = response.json()
+                    st.session_state.current_quote = orjson.loads(response.content)
                 else:
                     st.error(f"Error generating quote: {response.text}")
         
@@ -390,6 +589,7 @@ elif page == "Generate Quote":
             
             with col2:
                 # Pie chart view
+                px, _ = _plotly()
                 fig = px.pie(
                     breakdown_df, 
                     values='Amount', 
@@ -429,12 +629,13 @@ elif page == "Generate Quote":
                         quote['confidence_score'] += 5  # Increase confidence score
                         
                         st.session_state.current_quote = quote
-                        st.experimental_rerun()
+                        st.rerun()
             
             with col3:
                 st.button("Send to Customer")
 
-elif page == "Quote History":
+@st.fragment
+def _render_history():
     st.header("Quote History")
     
     # Filter options
@@ -471,59 +672,50 @@ elif page == "Quote History":
                 "Precision Manufacturing", "Global Construction"]
     statuses = ["Won", "Lost", "Pending"]
     
-    history_data = []
-    
-    for i in range(1, 51):  # Generate 50 quotes
-        quote_date = datetime.now() - timedelta(days=random.randint(1, 180))
-        status = random.choices(statuses, weights=[0.6, 0.3, 0.1])[0]
-        value = random.randint(25000, 400000)
-        
-        history_data.append({
-            "id": f"Q-{quote_date.strftime('%Y')}-{i:04d}",
-            "customer": random.choice(customers),
-            "project": f"Project {random.choice(['Alpha', 'Beta', 'Gamma', 'Delta', 'Epsilon', 'Omega'])}-{i:02d}",
-            "date": quote_date.strftime("%Y-%m-%d"),
-            "value": value,
-            "status": status,
-            "margin": random.randint(15, 35),
-            "win_probability": random.randint(50, 95) if status == "Pending" else None
-        })
+    n_quotes = 50
+    quote_numbers = np.arange(1, n_quotes + 1)
+    quote_dates = pd.Timestamp.now() - pd.to_timedelta(rng.integers(1, 181, size=n_quotes), unit="D")
+    status = rng.choice(statuses, size=n_quotes, p=[0.6, 0.3, 0.1])
+    project_names = pd.Series(rng.choice(['Alpha', 'Beta', 'Gamma', 'Delta', 'Epsilon', 'Omega'], size=n_quotes))
+    quote_suffix = pd.Series(quote_numbers).astype(str)
+    date_strings = pd.Series(quote_dates.strftime("%Y-%m-%d"))
     
     # Create DataFrame
-    history_df = pd.DataFrame(history_data)
-    
-    # Apply filters
-    filtered_df = history_df.copy()
+    history_df = pd.DataFrame({
+        "id": "Q-" + date_strings.str[:4] + "-" + quote_suffix.str.zfill(4),
+        "customer": pd.Categorical(rng.choice(customers, size=n_quotes), categories=customers),
+        "project": "Project " + project_names + "-" + quote_suffix.str.zfill(2),
+        "date": date_strings,
+        "value": rng.integers(25000, 400001, size=n_quotes),
+        "status": pd.Categorical(status, categories=statuses),
+        "margin": rng.integers(15, 36, size=n_quotes),
+        "win_probability": np.where(status == "Pending", rng.integers(50, 96, size=n_quotes), np.nan)
+    })
+    
+    # Apply filters as a single boolean mask
+    history_dates = pd.to_datetime(history_df["date"])
+    mask = history_df["value"].between(min_value, max_value).to_numpy()
     
     if "All" not in status_filter:
-        filtered_df = filtered_df[filtered_df["status"].isin(status_filter)]
+        mask &= history_df["status"].isin(status_filter).to_numpy()
     
     if "All" not in customer_filter:
-        filtered_df = filtered_df[filtered_df["customer"].isin(customer_filter)]
+        mask &= history_df["customer"].isin(customer_filter).to_numpy()
     
     if len(date_range) == 2:
         start_date, end_date = date_range
-        filtered_df = filtered_df[(filtered_df["date"] >= start_date.strftime("%Y-%m-%d")) & 
-                                (filtered_df["date"] <= end_date.strftime("%Y-%m-%d"))]
+        mask &= history_dates.between(pd.Timestamp(start_date), pd.Timestamp(end_date)).to_numpy()
     
-    filtered_df = filtered_df[(filtered_df["value"] >= min_value) & (filtered_df["value"] <= max_value)]
+    filtered_df = history_df.loc[mask]
     
     # Show results
     st.write(f"Found {len(filtered_df)} quotes")
     
-    # Format DataFrame for display
-    display_df = filtered_df.copy()
-    display_df["value"] = display_df["value"].apply(lambda x: f"${x:,}")
-    display_df["margin"] = display_df["margin"].apply(lambda x: f"{x}%")
-    display_df["win_probability"] = display_df["win_probability"].apply(lambda x: f"{x}%" if x else "")
-    
-    # Apply styling based on status
-    def color_status(val):
-        colors = {"Won": "green", "Lost": "red", "Pending": "orange"}
-        return f"color: {colors.get(val, 'black')}"
-    
+    # Format numeric columns at render time and style based on status
     st.dataframe(
-        display_df.style.map(color_status, subset=["status"]),
+        filtered_df.style
+        .format({"value": "${:,}", "margin": "{}%", "win_probability": "{:.0f}%"}, na_rep="")
+        .apply(_color_status_col, subset=["status"]),
         use_container_width=True
     )
     
@@ -546,15 +738,15 @@ elif page == "Quote History":
             st.info(f"**Date**: {selected_row['date']}")
         
         with col2:
-            st.metric("Quote Value", f"${selected_row['value']:,}" if isinstance(selected_row['value'], (int, float)) else selected_row['value'])
-            st.metric("Margin", f"{selected_row['margin']}%" if isinstance(selected_row['margin'], (int, float)) else selected_row['margin'])
+            st.metric("Quote Value", f"${selected_row['value']:,}")
+            st.metric("Margin", f"{selected_row['margin']}%")
         
         with col3:
             status_color = {"Won": "success", "Lost": "error", "Pending": "warning"}
             getattr(st, status_color.get(selected_row['status'], "info"))(f"Status: {selected_row['status']}")
             
-            if selected_row['status'] == "Pending":
-                st.metric("Win Probability", f"{selected_row['win_probability']}%" if isinstance(selected_row['win_probability'], (int, float)) else selected_row['win_probability'])
+            if pd.notna(selected_row['win_probability']):
+                st.metric("Win Probability", f"{selected_row['win_probability']:.0f}%")
         
         # Quote feedback (only for Won/Lost)
         if selected_row['status'] in ["Won", "Lost"]:
@@ -575,46 +767,101 @@ elif page == "Quote History":
             
             st.info(random.choice(feedback[selected_row['status']]))
 
-elif page == "Market Insights":
-    st.header("Market Insights")
+def _render_customer_insights():
+    st.subheader("Customer Insights")
+    
+    # Mock data for customer insights
+    customer_data = {
+        "customer": ["Aerospace Dynamics", "Industrial Solutions", "MedTech Innovations", 
+                    "EnergyTech Systems", "Precision Manufacturing", "Global Construction"],
+        "quotes_ytd": [42, 35, 28, 22, 18, 15],
+        "win_rate": [72, 65, 81, 54, 67, 60],
+        "avg_value": [185000, 127500, 215000, 97500, 145000, 320000],
+        "relationship_years": [5, 3, 7, 2, 4, 1]
+    }
+    customer_df = pd.DataFrame(customer_data)
+    
+    fig = _customer_scatter_fig(customer_df)
+    
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Customer segments
+    st.subheader("Customer Segmentation")
     
-    # Tabs for different insights
-    tab1, tab2, tab3, tab4 = st.tabs(["Price Trends", "Win Rate Analysis", "Customer Insights", "Material Costs"])
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Key Accounts", "3", "high-value, established relationships")
+        st.markdown("""
+        - Aerospace Dynamics
+        - MedTech Innovations
+        - Precision Manufacturing
+        """)
     
-    with tab1:
+    with col2:
+        st.metric("Growth Targets", "2", "emerging relationships")
+        st.markdown("""
+        - Industrial Solutions
+        - EnergyTech Systems
+        """)
+    
+    with col3:
+        st.metric("New Opportunities", "1", "new client")
+        st.markdown("""
+        - Global Construction
+        """)
+    
+    st.info("""
+    **AI Recommendation**: Focus on cross-selling opportunities with MedTech Innovations. 
+    Historical data shows they're 75% more likely to accept quotes that include preventative 
+    maintenance packages and extended warranties.
+    """)
+
+def _render_material_costs():
+    st.subheader("Material Cost Trends")
+    
+    # Mock data for material costs (cached across reruns)
+    materials_df = _material_costs_df()
+    
+    # Plot
+    fig = _material_costs_fig(materials_df)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("""
+    ### Material Cost Insights
+    
+    - **Titanium** prices showing significant volatility due to supply chain constraints
+    - **Electronics** components experiencing continued upward pressure
+    - **Steel** prices stabilizing after previous increases
+    - **Plastics** expected to see moderate increases in coming quarter
+    
+    **Recommendation**: Consider locking in pricing for titanium and electronic components
+    to mitigate volatility risk for upcoming projects.
+    """)
+
+@st.fragment
+def _render_market_insights():
+    st.header("Market Insights")
+    px, go = _plotly()
+    
+    # Section picker for different insights; unlike st.tabs, only the selected
+    # section's body (and its figures) is executed on each rerun
+    section = st.radio(
+        "Insight",
+        ["Price Trends", "Win Rate Analysis", "Customer Insights", "Material Costs"],
+        horizontal=True,
+        key="insights_section",
+        label_visibility="collapsed"
+    )
+    
+    if section == "Price Trends":
         st.subheader("Industry Price Trends")
         
-        # Mock data for price trends
-        industries = ["Aerospace", "Automotive", "Electronics", "Medical", "Energy", "Construction"]
-        months = [(datetime.now() - timedelta(days=30*i)).strftime("%b %Y") for i in range(12, 0, -1)]
+        # Mock data for price trends (cached across reruns)
+        trends_df = _price_trends_df()
         
-        price_trends = {}
-        for industry in industries:
-            # Create a baseline with some randomness
-            baseline = random.randint(80, 120)
-            # Add some trend
-            trend = random.choice([0.02, -0.01, 0.01, 0.03, -0.02])
-            
-            prices = []
-            current = baseline
-            for i in range(12):
-                # Add some noise to the trend
-                current = current * (1 + trend + random.uniform(-0.02, 0.02))
-                prices.append(current)
-            
-            price_trends[industry] = prices
-        
-        # Create DataFrame
-        trends_df = pd.DataFrame(price_trends, index=months)
-        
-        # Plot
-        fig = px.line(trends_df, markers=True)
-        fig.update_layout(
-            title="Average Quote Prices by Industry (12-Month Trend)",
-            xaxis_title="Month",
-            yaxis_title="Relative Price Index (100 = Baseline)",
-            legend_title="Industry"
-        )
+        # Plot (WebGL traces)
+        fig = _price_trends_fig(trends_df)
         st.plotly_chart(fig, use_container_width=True)
         
         st.markdown("""
@@ -625,7 +872,7 @@ elif page == "Market Insights":
         - **Construction** showing seasonal variations aligned with project cycles
         """)
     
-    with tab2:
+    if section == "Win Rate Analysis":
         st.subheader("Win Rate Analysis")
         
         # Mock data for win rates by different factors
@@ -645,7 +892,7 @@ elif page == "Market Insights":
             title="Win Rate by Quote Response Time",
             labels={"response_time": "Response Time", "win_rate": "Win Rate (%)"},
             color="win_rate",
-            color_continuous_scale=["red", "yellow", "green"],
+            color_continuous_scale=RYG_SCALE,
             range_color=[30, 80]
         )
         st.plotly_chart(fig1, use_container_width=True)
@@ -658,41 +905,9 @@ elif page == "Market Insights":
         }
         value_df = pd.DataFrame(value_data)
         
-        # Fixed version of win rate by quote value chart
-        fig2 = px.bar(
-            value_df,
-            x="value_range",
-            y="win_rate",
-            text=value_df["win_rate"].apply(lambda x: f"{x}%"),
-            title="Win Rate by Quote Value",
-            labels={"value_range": "Quote Value Range", "win_rate": "Win Rate (%)"},
-            color="win_rate",
-            color_continuous_scale=["red", "yellow", "green"],
-            range_color=[40, 70]
-        )
-
-        # Add a secondary axis for quote count
-        fig2.add_trace(
-            go.Scatter(
-                x=value_df["value_range"],
-                y=value_df["quote_count"],
-                mode="lines+markers",
-                name="Quote Count",
-                yaxis="y2",
-                line=dict(color="darkblue", width=2),
-                marker=dict(size=8)
-            )
-        )
-
-        fig2.update_layout(
-            yaxis=dict(title="Win Rate (%)"),
-            yaxis2=dict(
-                title="Quote Count",
-                overlaying="y",
-                side="right",
-                showgrid=False
-            ),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        fig2 = _win_rate_count_fig(
+            value_df["value_range"], value_df["win_rate"], value_df["quote_count"],
+            (40, 70), "Win Rate by Quote Value", "Quote Value Range"
         )
         st.plotly_chart(fig2, use_container_width=True)
         
@@ -705,119 +920,20 @@ elif page == "Market Insights":
         - The **sweet spot** appears to be in the $100K-$200K range, balancing win rate with quote value
         """)
     
-    with tab3:
-        st.subheader("Customer Insights")
-        
-        # Mock data for customer insights
-        customer_data = {
-            "customer": ["Aerospace Dynamics", "Industrial Solutions", "MedTech Innovations", 
-                        "EnergyTech Systems", "Precision Manufacturing", "Global Construction"],
-            "quotes_ytd": [42, 35, 28, 22, 18, 15],
-            "win_rate": [72, 65, 81, 54, 67, 60],
-            "avg_value": [185000, 127500, 215000, 97500, 145000, 320000],
-            "relationship_years": [5, 3, 7, 2, 4, 1]
-        }
-        customer_df = pd.DataFrame(customer_data)
-        
-        # Scatter plot of customers
-        fig = px.scatter(
-            customer_df,
-            x="avg_value",
-            y="win_rate",
-            size="quotes_ytd",
-            color="relationship_years",
-            hover_name="customer",
-            size_max=60,
-            title="Customer Portfolio Analysis",
-            labels={
-                "avg_value": "Average Quote Value ($)",
-                "win_rate": "Win Rate (%)",
-                "quotes_ytd": "Number of Quotes YTD",
-                "relationship_years": "Relationship Length (Years)"
-            }
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Customer segments
-        st.subheader("Customer Segmentation")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric("Key Accounts", "3", "high-value, established relationships")
-            st.markdown("""
-            - Aerospace Dynamics
-            - MedTech Innovations
-            - Precision Manufacturing
-            """)
-        
-        with col2:
-            st.metric("Growth Targets", "2", "emerging relationships")
-            st.markdown("""
-            - Industrial Solutions
-            - EnergyTech Systems
-            """)
-            
-        with col3:
-            st.metric("New Opportunities", "1", "new client")
-            st.markdown("""
-            - Global Construction
-            """)
-        
-        st.info("""
-        **AI Recommendation**: Focus on cross-selling opportunities with MedTech Innovations. 
-        Historical data shows they're 75% more likely to accept quotes that include preventative 
-        maintenance packages and extended warranties.
-        """)
+    if section == "Customer Insights":
+        _render_customer_insights()
     
-    with tab4:
-        st.subheader("Material Cost Trends")
-        
-        # Mock data for material costs
-        materials = ["Steel", "Aluminum", "Copper", "Titanium", "Plastics", "Electronics"]
-        quarters = ["Q2 2024", "Q3 2024", "Q4 2024", "Q1 2025", "Q2 2025 (Forecast)"]
-        
-        # Create random trends with some correlation
-        base_trend = [1.0]
-        for i in range(4):
-            next_val = base_trend[-1] * (1 + random.uniform(-0.05, 0.08))
-            base_trend.append(next_val)
-        
-        material_trends = {}
-        for material in materials:
-            # Add some correlation to base trend but with variations
-            material_trend = []
-            for i, base in enumerate(base_trend):
-                factor = 1 + random.uniform(-0.1, 0.1)
-                material_trend.append(base * factor)
-            
-            material_trends[material] = material_trend
-        
-        # Create DataFrame
-        materials_df = pd.DataFrame(material_trends, index=quarters)
-        
-        # Plot
-        fig = px.line(materials_df, markers=True)
-        fig.update_layout(
-            title="Material Cost Index Trends (Base 1.0 = Q2 2024)",
-            xaxis_title="Quarter",
-            yaxis_title="Cost Index",
-            legend_title="Material"
-        )
-        st.plotly_chart(fig, use_container_width=True)
-        
-        st.markdown("""
-        ### Material Cost Insights
-        
-        - **Titanium** prices showing significant volatility due to supply chain constraints
-        - **Electronics** components experiencing continued upward pressure
-        - **Steel** prices stabilizing after previous increases
-        - **Plastics** expected to see moderate increases in coming quarter
-        
-        **Recommendation**: Consider locking in pricing for titanium and electronic components
-        to mitigate volatility risk for upcoming projects.
-        """)
+    if section == "Material Costs":
+        _render_material_costs()
+
+if page == "Dashboard":
+    _render_dashboard()
+elif page == "Generate Quote":
+    _render_generate_quote()
+elif page == "Quote History":
+    _render_history()
+elif page == "Market Insights":
+    _render_market_insights()
 
 # Add footer with credits
 st.markdown("---")
@@ -0,0 +1,38 @@
+# db/_analytics_kernels.py
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Installed from requirements.txt; fall back to plain Python where numba has no wheels
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# Quote value ranges used for win rate analysis (upper bound is open-ended)
+PRICE_BUCKETS = np.array([0.0, 50_000.0, 100_000.0, 200_000.0, 500_000.0, np.inf])
+PRICE_BUCKET_LABELS = ["<$50K", "$50K-$100K", "$100K-$200K", "$200K-$500K", ">$500K"]
+
+# Eagerly compiled for a fixed signature, so the JIT cost is paid at import
+# (and cached on disk) rather than on the first analytics request.
+@njit("Tuple((int64[:], int64[:]))(float64[:], boolean[:], float64[:])", cache=True)
+def compute_win_rate_buckets(prices, accepted, buckets):
+    """
+    Count quotes and accepted quotes per price bucket.
+    `buckets` holds ascending bucket edges; a price p falls in bucket i
+    when buckets[i] <= p < buckets[i + 1].
+    """
+    n_buckets = buckets.shape[0] - 1
+    totals = np.zeros(n_buckets, dtype=np.int64)
+    wins = np.zeros(n_buckets, dtype=np.int64)
+
+    for i in range(prices.shape[0]):
+        price = prices[i]
+        for b in range(n_buckets):
+            if buckets[b] <= price < buckets[b + 1]:
+                totals[b] += 1
+                if accepted[i]:
+                    wins[b] += 1
+                break
+
+    return totals, wins
@@ -1,10 +1,155 @@
 # db/structured_db.py
 import sqlite3
-import json
 import os
 import logging
+import threading
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+import orjson
+from cachetools import TTLCache
+
+from db._analytics_kernels import PRICE_BUCKETS, PRICE_BUCKET_LABELS, compute_win_rate_buckets
+
+# Schema, shared with generate_mock_data.py so both create identical tables.
+# Indexes are separate so bulk loaders can build them after inserting.
+SQL_CREATE_TABLES = '''
+-- Quotes and customers are clustered directly on their TEXT keys
+CREATE TABLE IF NOT EXISTS quotes (
+    quote_id TEXT PRIMARY KEY,
+    customer_id TEXT NOT NULL,
+    project_name TEXT NOT NULL,
+    total_price REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    quote_data TEXT NOT NULL,
+    status TEXT DEFAULT 'pending'
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    customer_name TEXT NOT NULL,
+    industry TEXT,
+    relationship_length INTEGER,
+    credit_score INTEGER
+) WITHOUT ROWID;
+
+-- Feedback
+CREATE TABLE IF NOT EXISTS feedback (
+    feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    quote_id TEXT NOT NULL,
+    feedback_text TEXT,
+    accepted BOOLEAN NOT NULL,
+    timestamp TEXT NOT NULL,
+    FOREIGN KEY (quote_id) REFERENCES quotes (quote_id)
+);
+'''
+
+SQL_CREATE_INDEXES = '''
+-- Price-range lookups of won quotes, newest first
+CREATE INDEX IF NOT EXISTS idx_quotes_status_price_ts
+ON quotes (status, total_price, timestamp DESC);
+
+-- Per-customer history, newest first
+CREATE INDEX IF NOT EXISTS idx_quotes_customer_ts ON quotes (customer_id, timestamp DESC);
+
+-- Covers per-customer quote listings without touching quote_data
+CREATE INDEX IF NOT EXISTS idx_quotes_cust_cover
+ON quotes (customer_id, timestamp DESC, project_name, total_price, status);
+
+-- Status breakdowns
+CREATE INDEX IF NOT EXISTS idx_quotes_status ON quotes (status);
+
+-- Monthly analytics grouping (expression index)
+CREATE INDEX IF NOT EXISTS idx_quotes_month ON quotes (strftime('%Y-%m', timestamp));
+
+-- Feedback lookups by quote (foreign key)
+CREATE INDEX IF NOT EXISTS idx_feedback_quote ON feedback (quote_id);
+'''
+
+# Hot statements are kept as module-level constants so the identical SQL text
+# hits each connection's prepared-statement cache on every call
+SQL_INSERT_QUOTE = """
+INSERT INTO quotes
+(quote_id, customer_id, project_name, total_price, timestamp, quote_data)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SQL_GET_QUOTE = "SELECT quote_data FROM quotes WHERE quote_id = ?"
+
+SQL_INSERT_FEEDBACK = """
+INSERT INTO feedback
+(quote_id, feedback_text, accepted, timestamp)
+VALUES (?, ?, ?, ?)
+"""
+
+SQL_UPDATE_QUOTE_STATUS = """
+UPDATE quotes
+SET status = ?
+WHERE quote_id = ?
+"""
+
+SQL_GET_ACCEPTED_QUOTES = "SELECT quote_data FROM quotes WHERE status = 'accepted'"
+
+SQL_GET_CUSTOMER = """
+SELECT customer_id, customer_name, industry, relationship_length, credit_score
+FROM customers
+WHERE customer_id = ?
+"""
+
+SQL_GET_CUSTOMER_QUOTES = """
+SELECT quote_data
+FROM quotes
+WHERE customer_id = ?
+ORDER BY timestamp DESC
+"""
+
+SQL_GET_CUSTOMER_QUOTE_SUMMARIES = """
+SELECT quote_id, project_name, total_price, timestamp, status
+FROM quotes
+WHERE customer_id = ?
+ORDER BY timestamp DESC
+"""
+
+SQL_GET_CUSTOMER_STATS = """
+SELECT COUNT(*), SUM(status = 'accepted'), AVG(total_price)
+FROM quotes
+WHERE customer_id = ?
+"""
+
+SQL_GET_SUCCESSFUL_QUOTES_IN_RANGE = """
+SELECT quote_data
+FROM quotes
+WHERE status = 'accepted'
+AND total_price BETWEEN ? AND ?
+ORDER BY timestamp DESC
+LIMIT ?
+"""
+
+SQL_QUOTE_ANALYTICS = """
+WITH agg AS (
+    SELECT status, total_price, strftime('%Y-%m', timestamp) AS month
+    FROM quotes
+)
+SELECT * FROM (
+    SELECT
+        month,
+        NULL AS status,
+        COUNT(*) AS quote_count,
+        AVG(total_price) AS avg_price,
+        SUM(CASE WHEN status = 'accepted' THEN 1 ELSE 0 END) AS accepted_count
+    FROM agg
+    GROUP BY month
+    ORDER BY month DESC
+    LIMIT 12
+)
+UNION ALL
+SELECT NULL, status, COUNT(*), AVG(total_price), NULL
+FROM agg
+GROUP BY status
+"""
+
+SQL_PRICE_STATUS = "SELECT total_price, status = 'accepted' FROM quotes"
+
 class StructuredDB:
     """
     Structured database for storing and retrieving quote data,
@@ -18,53 +163,58 @@ class StructuredDB:
         # Ensure the directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
+        # Long-lived read-write connection shared across threads;
+        # the lock keeps statements on it from interleaving
+        self.conn = self._connect()
+        self._conn_lock = threading.Lock()
+        
+        # Short-lived cache of the analytics summary, held as orjson bytes so every
+        # caller decodes its own copy; cleared on every write
+        self._analytics_cache = TTLCache(maxsize=1, ttl=60)
+        
         # Initialize database
         self._initialize_db()
         
+        # Separate read-only connection for SELECTs, so reads don't queue behind writes.
+        # Its lock also guards the analytics cache.
+        self.ro_conn = self._connect_read_only()
+        self._ro_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for concurrent reads and cheap commits."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=memory;
+            PRAGMA cache_size=-64000;
+            PRAGMA mmap_size=268435456;
+        """)
+        return conn
+        
+    def _connect_read_only(self) -> sqlite3.Connection:
+        """Open a query-only connection to the same database file."""
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, cached_statements=256
+        )
+        conn.executescript("""
+            PRAGMA query_only=1;
+            PRAGMA temp_store=memory;
+            PRAGMA cache_size=-64000;
+            PRAGMA mmap_size=268435456;
+        """)
+        return conn
+    
+    def _invalidate_analytics(self):
+        """Drop the cached analytics summary after a committed write."""
+        with self._ro_lock:
+            self._analytics_cache.clear()
+        
     def _initialize_db(self):
         """Initialize database tables if they don't exist."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create quotes table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS quotes (
-                quote_id TEXT PRIMARY KEY,
-                customer_id TEXT NOT NULL,
-                project_name TEXT NOT NULL,
-                total_price REAL NOT NULL,
-                timestamp TEXT NOT NULL,
-                quote_data TEXT NOT NULL,
-                status TEXT DEFAULT 'pending'
-            )
-            ''')
-            
-            # Create customers table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                customer_id TEXT PRIMARY KEY,
-                customer_name TEXT NOT NULL,
-                industry TEXT,
-                relationship_length INTEGER,
-                credit_score INTEGER
-            )
-            ''')
-            
-            # Create feedback table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS feedback (
-                feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                quote_id TEXT NOT NULL,
-                feedback_text TEXT,
-                accepted BOOLEAN NOT NULL,
-                timestamp TEXT NOT NULL,
-                FOREIGN KEY (quote_id) REFERENCES quotes (quote_id)
-            )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            # Create all tables and indexes in one script (executescript commits on its own)
+            self.conn.executescript(SQL_CREATE_TABLES + SQL_CREATE_INDEXES)
             
             # Seed database if it's empty
             if os.environ.get("SEED_DB", "false").lower() == "true":
@@ -76,27 +226,21 @@ class StructuredDB:
     def store_quote(self, quote_data: Dict[str, Any]) -> bool:
         """Store a new quote in the database."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                '''
-                INSERT INTO quotes 
-                (quote_id, customer_id, project_name, total_price, timestamp, quote_data) 
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''',
-                (
-                    quote_data["quote_id"],
-                    quote_data["customer_id"],
-                    quote_data["project_name"],
-                    quote_data["total_price"],
-                    quote_data["timestamp"],
-                    json.dumps(quote_data)
+            with self._conn_lock, self.conn:
+                cursor = self.conn.cursor()
+                
+                cursor.execute(
+                    SQL_INSERT_QUOTE,
+                    (
+                        quote_data["quote_id"],
+                        quote_data["customer_id"],
+                        quote_data["project_name"],
+                        quote_data["total_price"],
+                        quote_data["timestamp"],
+                        orjson.dumps(quote_data, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+                    )
                 )
-            )
-            
-            conn.commit()
-            conn.close()
+            self._invalidate_analytics()
             return True
         except Exception as e:
             self.logger.error(f"Error storing quote: {str(e)}")
@@ -105,19 +249,14 @@ class StructuredDB:
     def get_quote(self, quote_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a quote by ID."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT quote_data FROM quotes WHERE quote_id = ?",
-                (quote_id,)
-            )
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self._ro_lock:
+                result = self.ro_conn.execute(
+                    SQL_GET_QUOTE,
+                    (quote_id,)
+                ).fetchone()
             
             if result:
-                return json.loads(result[0])
+                return orjson.loads(result[0])
             return None
         except Exception as e:
             self.logger.error(f"Error retrieving quote: {str(e)}")
@@ -128,65 +267,77 @@ class StructuredDB:
         try:
             from datetime import datetime
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Insert feedback
-            cursor.execute(
-                '''
-                INSERT INTO feedback
-                (quote_id, feedback_text, accepted, timestamp)
-                VALUES (?, ?, ?, ?)
-                ''',
-                (
-                    quote_id,
-                    feedback,
-                    accepted,
-                    datetime.now().isoformat()
-                )
-            )
-            
-            # Update quote status
             new_status = "accepted" if accepted else "rejected"
-            cursor.execute(
-                '''
-                UPDATE quotes
-                SET status = ?
-                WHERE quote_id = ?
-                ''',
-                (new_status, quote_id)
-            )
             
-            conn.commit()
-            conn.close()
+            with self._conn_lock, self.conn:
+                cursor = self.conn.cursor()
+                
+                # Insert feedback
+                cursor.execute(
+                    SQL_INSERT_FEEDBACK,
+                    (
+                        quote_id,
+                        feedback,
+                        accepted,
+                        datetime.now().isoformat()
+                    )
+                )
+                
+                # Update quote status
+                cursor.execute(
+                    SQL_UPDATE_QUOTE_STATUS,
+                    (new_status, quote_id)
+                )
+            self._invalidate_analytics()
             return True
         except Exception as e:
             self.logger.error(f"Error recording feedback: {str(e)}")
             return False
     
+    def get_quotes(self, quote_ids: List[str]) -> List[Dict[str, Any]]:
+        """Retrieve several quotes by ID in one query, in the order given."""
+        if not quote_ids:
+            return []
+        
+        try:
+            placeholders = ",".join("?" * len(quote_ids))
+            with self._ro_lock:
+                rows = self.ro_conn.execute(
+                    f"SELECT quote_id, quote_data FROM quotes WHERE quote_id IN ({placeholders})",
+                    list(quote_ids)
+                ).fetchall()
+            
+            quotes = {quote_id: orjson.loads(quote_data) for quote_id, quote_data in rows}
+            return [quotes[quote_id] for quote_id in quote_ids if quote_id in quotes]
+        except Exception as e:
+            self.logger.error(f"Error retrieving quotes: {str(e)}")
+            return []
+    
+    def get_accepted_quotes(self) -> List[Dict[str, Any]]:
+        """Retrieve all accepted quotes."""
+        try:
+            with self._ro_lock:
+                rows = self.ro_conn.execute(
+                    SQL_GET_ACCEPTED_QUOTES
+                ).fetchall()
+            
+            return [orjson.loads(row[0]) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving accepted quotes: {str(e)}")
+            return []
+    
     def get_customer_data(self, customer_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve customer data by ID."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT * FROM customers WHERE customer_id = ?",
-                (customer_id,)
-            )
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    "customer_id": result[0],
-                    "customer_name": result[1],
-                    "industry": result[2],
-                    "relationship_length": result[3],
-                    "credit_score": result[4]
-                }
-            return None
+            with self._ro_lock:
+                cursor = self.ro_conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                result = cursor.execute(
+                    SQL_GET_CUSTOMER,
+                    (customer_id,)
+                ).fetchone()
+            
+            return dict(result) if result else None
         except Exception as e:
             self.logger.error(f"Error retrieving customer data: {str(e)}")
             return None
@@ -194,82 +345,118 @@ class StructuredDB:
     def get_customer_quotes(self, customer_id: str) -> List[Dict[str, Any]]:
         """Retrieve all quotes for a specific customer."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._ro_lock:
+                results = self.ro_conn.execute(
+                    SQL_GET_CUSTOMER_QUOTES,
+                    (customer_id,)
+                ).fetchall()
             
-            cursor.execute(
-                """
-                SELECT quote_data 
-                FROM quotes 
-                WHERE customer_id = ? 
-                ORDER BY timestamp DESC
-                """,
-                (customer_id,)
-            )
+            return [orjson.loads(row[0]) for row in results]
+        except Exception as e:
+            self.logger.error(f"Error retrieving customer quotes: {str(e)}")
+            return []
+    
+    def get_customer_quote_summaries(self, customer_id: str) -> List[Dict[str, Any]]:
+        """Retrieve summary columns of a customer's quotes, newest first, without decoding quote_data."""
+        try:
+            with self._ro_lock:
+                cursor = self.ro_conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                rows = cursor.execute(
+                    SQL_GET_CUSTOMER_QUOTE_SUMMARIES,
+                    (customer_id,)
+                ).fetchall()
+            
+            return [dict(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Error retrieving customer quote summaries: {str(e)}")
+            return []
+    
+    def get_customer_stats(self, customer_id: str) -> Dict[str, Any]:
+        """Aggregate a customer's quote count, accepted count and average quote price."""
+        try:
+            with self._ro_lock:
+                total, wins, avg_price = self.ro_conn.execute(
+                    SQL_GET_CUSTOMER_STATS,
+                    (customer_id,)
+                ).fetchone()
             
-            results = cursor.fetchall()
-            conn.close()
+            return {
+                "total_projects": total,
+                "accepted_projects": wins or 0,
+                "avg_project_size": avg_price or 0
+            }
+        except Exception as e:
+            self.logger.error(f"Error retrieving customer stats: {str(e)}")
+            return {"total_projects": 0, "accepted_projects": 0, "avg_project_size": 0}
+    
+    def get_successful_quotes_in_range(self, price_min: float, price_max: float, limit: int = 5) -> List[Dict[str, Any]]:
+        """Retrieve the most recent accepted quotes with a total price in the given range."""
+        try:
+            with self._ro_lock:
+                rows = self.ro_conn.execute(
+                    SQL_GET_SUCCESSFUL_QUOTES_IN_RANGE,
+                    (price_min, price_max, limit)
+                ).fetchall()
             
-            return [json.loads(row[0]) for row in results]
+            return [orjson.loads(row[0]) for row in rows]
         except Exception as e:
-            self.logger.error(f"Error retrieving customer quotes: {str(e)}")
+            self.logger.error(f"Error retrieving successful quotes: {str(e)}")
             return []
     
     def get_quote_analytics(self) -> Dict[str, Any]:
         """Get analytics data on quotes - win rates, average margins, etc."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get total quotes count
-            cursor.execute("SELECT COUNT(*) FROM quotes")
-            total_quotes = cursor.fetchone()[0]
-            
-            # Get status distribution
-            cursor.execute("""
-                SELECT status, COUNT(*) 
-                FROM quotes 
-                GROUP BY status
-            """)
-            status_counts = {status: count for status, count in cursor.fetchall()}
-            
-            # Calculate average prices by status
-            cursor.execute("""
-                SELECT status, AVG(total_price) 
-                FROM quotes 
-                GROUP BY status
-            """)
-            avg_prices = {status: price for status, price in cursor.fetchall()}
-            
-            # Get monthly trends
-            cursor.execute("""
-                SELECT 
-                    strftime('%Y-%m', timestamp) as month,
-                    COUNT(*) as quote_count,
-                    AVG(total_price) as avg_price,
-                    SUM(CASE WHEN status = 'accepted' THEN 1 ELSE 0 END) as accepted_count
-                FROM quotes
-                GROUP BY month
-                ORDER BY month DESC
-                LIMIT 12
-            """)
-            monthly_data = [{
-                "month": row[0],
-                "quote_count": row[1],
-                "avg_price": row[2],
-                "accepted_count": row[3],
-                "win_rate": row[3] / row[1] if row[1] > 0 else 0
-            } for row in cursor.fetchall()]
-            
-            conn.close()
+            with self._ro_lock:
+                cached = self._analytics_cache.get("analytics")
+                if cached is not None:
+                    return orjson.loads(cached)
+                
+                cursor = self.ro_conn.cursor()
+                
+                # Monthly trends plus per-status aggregates (month IS NULL),
+                # computed in a single statement over one pass of the quotes table
+                cursor.execute(SQL_QUOTE_ANALYTICS)
+                rows = cursor.fetchall()
+                
+                status_rows = [row for row in rows if row[0] is None]
+                status_counts = {row[1]: row[2] for row in status_rows}
+                avg_prices = {row[1]: row[3] for row in status_rows}
+                total_quotes = sum(status_counts.values())
+                
+                monthly_data = [{
+                    "month": row[0],
+                    "quote_count": row[2],
+                    "avg_price": row[3],
+                    "accepted_count": row[4],
+                    "win_rate": row[4] / row[2] if row[2] > 0 else 0
+                } for row in rows if row[0] is not None]
+                
+                # Win rate by quote value range
+                cursor.execute(SQL_PRICE_STATUS)
+                rows = cursor.fetchall()
+                totals, wins = compute_win_rate_buckets(
+                    np.array([row[0] for row in rows], dtype=np.float64),
+                    np.array([bool(row[1]) for row in rows], dtype=np.bool_),
+                    PRICE_BUCKETS
+                )
+                price_range_data = [{
+                    "value_range": label,
+                    "quote_count": int(count),
+                    "win_rate": int(won) / int(count) if count > 0 else 0
+                } for label, count, won in zip(PRICE_BUCKET_LABELS, totals, wins)]
+                
+                analytics = {
+                    "total_quotes": total_quotes,
+                    "status_distribution": status_counts,
+                    "avg_prices_by_status": avg_prices,
+                    "monthly_trends": monthly_data,
+                    "win_rate_by_value_range": price_range_data,
+                    "win_rate": status_counts.get("accepted", 0) / total_quotes if total_quotes > 0 else 0
+                }
+                self._analytics_cache["analytics"] = orjson.dumps(analytics)
             
-            return {
-                "total_quotes": total_quotes,
-                "status_distribution": status_counts,
-                "avg_prices_by_status": avg_prices,
-                "monthly_trends": monthly_data,
-                "win_rate": status_counts.get("accepted", 0) / total_quotes if total_quotes > 0 else 0
-            }
+            return analytics
         except Exception as e:
             self.logger.error(f"Error retrieving quote analytics: {str(e)}")
             return {
@@ -282,14 +469,7 @@ class StructuredDB:
     def _seed_database(self):
         """Seed the database with sample data for demonstration."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Check if we already have data
-            cursor.execute("SELECT COUNT(*) FROM quotes")
-            if cursor.fetchone()[0] > 0:
-                conn.close()
-                return
+            from datetime import datetime, timedelta
             
             # Add sample customers
             sample_customers = [
@@ -298,94 +478,102 @@ class StructuredDB:
                 ("cust-103", "MedTech Innovations", "Medical", 3, 90)
             ]
             
-            cursor.executemany(
-                """
-                INSERT INTO customers
-                (customer_id, customer_name, industry, relationship_length, credit_score)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                sample_customers
-            )
+            feedback_options = {
+                "accepted": [
+                    "Price was competitive and timeline works for us.",
+                    "Very detailed quote, gives us confidence in your abilities.",
+                    "The breakdown helped us understand the value proposition."
+                ],
+                "rejected": [
+                    "Found a more competitive price elsewhere.",
+                    "Timeline was too long for our needs.",
+                    "Materials specification didn't meet our requirements."
+                ]
+            }
+            project_types = ["Assembly", "Fabrication", "Design", "Testing", "Maintenance"]
+            
+            # Draw every random column at once, then zip them into rows
+            n_quotes = 19
+            rng = np.random.default_rng(42)
+            customer_ids = rng.choice([101, 102, 103], n_quotes).tolist()
+            name_prefixes = rng.choice(['Industrial', 'Precision', 'Advanced'], n_quotes).tolist()
+            name_types = rng.choice(project_types, n_quotes).tolist()
+            prices = rng.uniform(50000, 300000, n_quotes).tolist()
+            days_ago = rng.integers(0, 181, n_quotes).tolist()
+            confidence_scores = rng.integers(75, 99, n_quotes).tolist()
+            statuses = rng.choice(["pending", "accepted", "rejected"], n_quotes).tolist()
+            feedback_picks = rng.integers(0, 3, n_quotes).tolist()
+            
+            now = datetime.now()
+            quote_ids = [f"quote-{i:03d}" for i in range(1, n_quotes + 1)]
+            timestamps = [(now - timedelta(days=days)).isoformat() for days in days_ago]
+            project_names = [f"{prefix} {kind}" for prefix, kind in zip(name_prefixes, name_types)]
+            
+            quote_rows = [
+                (
+                    quote_id,
+                    f"cust-{customer}",
+                    project_name,
+                    total_price,
+                    timestamp,
+                    orjson.dumps({
+                        "quote_id": quote_id,
+                        "customer_id": f"cust-{customer}",
+                        "project_name": project_name,
+                        "total_price": total_price,
+                        "timestamp": timestamp,
+                        "breakdown": {
+                            "materials": total_price * 0.6,
+                            "labor": total_price * 0.3,
+                            "overhead": total_price * 0.1
+                        },
+                        "confidence_score": confidence
+                    }).decode(),
+                    status
+                )
+                for quote_id, customer, project_name, total_price, timestamp, confidence, status in zip(
+                    quote_ids, customer_ids, project_names, prices, timestamps, confidence_scores, statuses
+                )
+            ]
             
-            # Add sample quotes
-            from datetime import datetime, timedelta
-            import random
+            # Add feedback for decided quotes
+            feedback_rows = [
+                (quote_id, feedback_options[status][pick], status == "accepted", timestamp)
+                for quote_id, status, pick, timestamp in zip(quote_ids, statuses, feedback_picks, timestamps)
+                if status in ("accepted", "rejected")
+            ]
             
-            for i in range(1, 20):
-                quote_id = f"quote-{i:03d}"
-                customer_id = f"cust-{random.choice([101, 102, 103])}"
-                project_types = ["Assembly", "Fabrication", "Design", "Testing", "Maintenance"]
-                project_name = f"{random.choice(['Industrial', 'Precision', 'Advanced'])} {random.choice(project_types)}"
-                
-                total_price = random.uniform(50000, 300000)
-                timestamp = (datetime.now() - timedelta(days=random.randint(0, 180))).isoformat()
+            # Insert everything in a single transaction
+            with self._conn_lock, self.conn:
+                # Check if we already have data
+                if self.conn.execute("SELECT COUNT(*) FROM quotes").fetchone()[0] > 0:
+                    return
                 
-                # Generate random quote data
-                quote_data = {
-                    "quote_id": quote_id,
-                    "customer_id": customer_id,
-                    "project_name": project_name,
-                    "total_price": total_price,
-                    "timestamp": timestamp,
-                    "breakdown": {
-                        "materials": total_price * 0.6,
-                        "labor": total_price * 0.3,
-                        "overhead": total_price * 0.1
-                    },
-                    "confidence_score": random.randint(75, 98)
-                }
-                
-                status = random.choice(["pending", "accepted", "rejected"])
-                
-                cursor.execute(
+                self.conn.executemany(
+                    """
+                    INSERT INTO customers
+                    (customer_id, customer_name, industry, relationship_length, credit_score)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    sample_customers
+                )
+                self.conn.executemany(
                     """
                     INSERT INTO quotes
                     (quote_id, customer_id, project_name, total_price, timestamp, quote_data, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                     """,
-                    (
-                        quote_id,
-                        customer_id,
-                        project_name,
-                        total_price,
-                        timestamp,
-                        json.dumps(quote_data),
-                        status
-                    )
+                    quote_rows
+                )
+                self.conn.executemany(
+                    """
+                    INSERT INTO feedback
+                    (quote_id, feedback_text, accepted, timestamp)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    feedback_rows
                 )
-                
-                # Add feedback for some quotes
-                if status in ["accepted", "rejected"]:
-                    feedback_options = {
-                        "accepted": [
-                            "Price was competitive and timeline works for us.",
-                            "Very detailed quote, gives us confidence in your abilities.",
-                            "The breakdown helped us understand the value proposition."
-                        ],
-                        "rejected": [
-                            "Found a more competitive price elsewhere.",
-                            "Timeline was too long for our needs.",
-                            "Materials specification didn't meet our requirements."
-                        ]
-                    }
-                    
-                    cursor.execute(
-                        """
-                        INSERT INTO feedback
-                        (quote_id, feedback_text, accepted, timestamp)
-                        VALUES (?, ?, ?, ?)
-                        """,
-                        (
-                            quote_id,
-                            random.choice(feedback_options[status]),
-                            status == "accepted",
-                            timestamp
-                        )
-                    )
-            
-            conn.commit()
-            conn.close()
             self.logger.info("Database seeded with sample data")
             
         except Exception as e:
-            self.logger.error(f"Error seeding database: {str(e)}")
\ No newline at end of file
+            self.logger.error(f"Error seeding database: {str(e)}")
@@ -1,9 +1,13 @@
 # db/vector_store.py
+import atexit
 import os
+from functools import lru_cache
 from langchain.vectorstores import Chroma
 from langchain.embeddings import OpenAIEmbeddings
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
+
+GENERAL_RULES_QUERY = "General business rules for quoting"
 
 class VectorStore:
     """
@@ -11,6 +15,10 @@ class VectorStore:
     project information, and business rules.
     """
     
+    # Business rules returned per customer: customer-specific first, then general
+    CUSTOMER_RULES_K = 10
+    GENERAL_RULES_K = 5
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         # Initialize embeddings model
@@ -19,7 +27,18 @@ class VectorStore:
             api_key=os.environ.get("OPENAI_API_KEY")
         )
         
-        # Create collections for different types of data
+        # Memoized query embeddings; repeated search texts skip the OpenAI round-trip
+        self._embed_query = lru_cache(maxsize=1024)(self.embeddings.embed_query)
+        
+        # The general-rules query never changes, so embed it once up front
+        try:
+            self._general_rule_vec = self._embed_query(GENERAL_RULES_QUERY)
+        except Exception as e:
+            self.logger.error(f"Failed to embed general rules query: {str(e)}")
+            self._general_rule_vec = None
+        
+        # Create collections for different types of data; quotes_db indexes
+        # accepted quotes for similar-successful-project lookups
         self.quotes_db = self._initialize_collection("quotes")
         self.projects_db = self._initialize_collection("projects")
         self.rules_db = self._initialize_collection("business_rules")
@@ -27,6 +46,17 @@ class VectorStore:
         # If running for the first time, seed with synthetic data
         if os.environ.get("SEED_DB", "false").lower() == "true":
             self._seed_database()
+        
+        # Incremental adds are only flushed to disk on shutdown
+        atexit.register(self.persist)
+    
+    def persist(self):
+        """Persist all collections to disk."""
+        for collection in (self.quotes_db, self.projects_db, self.rules_db):
+            try:
+                collection.persist()
+            except Exception as e:
+                self.logger.error(f"Error persisting vector collection: {str(e)}")
     
     def _initialize_collection(self, collection_name: str):
         """Initialize a Chroma collection for vector storage."""
@@ -52,8 +82,8 @@ class VectorStore:
         Search for similar past projects based on project description.
         """
         try:
-            results = self.projects_db.similarity_search_with_score(
-                project_description, 
+            results = self.projects_db.similarity_search_by_vector_with_relevance_scores(
+                self._embed_query(project_description),
                 k=k
             )
             
@@ -70,29 +100,112 @@ class VectorStore:
             self.logger.error(f"Error searching similar projects: {str(e)}")
             return []
     
+    def quote_search_text(self, quote_data: Dict[str, Any]) -> str:
+        """
+        Text embedded for a quote: project name, description and material names.
+        """
+        materials = ", ".join(
+            m.get("name", "") for m in quote_data.get("materials") or [] if isinstance(m, dict)
+        )
+        parts = (
+            quote_data.get("project_name"),
+            quote_data.get("project_description"),
+            f"Materials: {materials}" if materials else None
+        )
+        return "\n".join(part for part in parts if part)
+    
+    def index_successful_quotes(self, quotes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add accepted quotes to the quotes index, skipping quotes already indexed.
+        Returns the number of quotes added.
+        """
+        try:
+            quotes = [q for q in quotes if q and q.get("quote_id")]
+            if not quotes:
+                return 0
+            
+            indexed = set(self.quotes_db.get(ids=[q["quote_id"] for q in quotes])["ids"])
+            new_quotes = [q for q in quotes if q["quote_id"] not in indexed]
+            if not new_quotes:
+                return 0
+            
+            self.quotes_db.add_texts(
+                texts=[self.quote_search_text(q) for q in new_quotes],
+                metadatas=[
+                    {"quote_id": q["quote_id"], "total_price": float(q.get("total_price") or 0)}
+                    for q in new_quotes
+                ],
+                ids=[q["quote_id"] for q in new_quotes]
+            )
+            
+            self.logger.info(f"Indexed {len(new_quotes)} successful quotes")
+            return len(new_quotes)
+        except Exception as e:
+            self.logger.error(f"Error indexing successful quotes: {str(e)}")
+            return 0
+    
+    def query_similar_successful(self,
+                                 query_text: str,
+                                 k: int = 5,
+                                 price_min: Optional[float] = None,
+                                 price_max: Optional[float] = None) -> List[str]:
+        """
+        Return the ids of the accepted quotes most similar to the query text,
+        optionally restricted to a total price range.
+        """
+        try:
+            price_filters = []
+            if price_min is not None:
+                price_filters.append({"total_price": {"$gte": price_min}})
+            if price_max is not None:
+                price_filters.append({"total_price": {"$lte": price_max}})
+            
+            if len(price_filters) > 1:
+                where = {"$and": price_filters}
+            else:
+                where = price_filters[0] if price_filters else None
+            
+            docs = self.quotes_db.similarity_search(query_text, k=k, filter=where)
+            return [doc.metadata["quote_id"] for doc in docs if "quote_id" in doc.metadata]
+        except Exception as e:
+            self.logger.error(f"Error searching similar successful quotes: {str(e)}")
+            return []
+    
     def get_business_rules(self, customer_id: str = None) -> List[Dict[str, Any]]:
         """
         Retrieve business rules relevant to a specific customer or general rules.
         """
         try:
-            # Search for customer-specific rules first
-            query = f"Business rules for customer {customer_id}"
             if customer_id:
-                results = self.rules_db.similarity_search_with_score(
-                    query,
-                    k=10,
-                    filter={"customer_id": customer_id}
+                # One query for customer-specific and general rules together, then
+                # keep the top hits of each group with customer rules first
+                query_vec = self._embed_query(f"Business rules for customer {customer_id}")
+                k = self.CUSTOMER_RULES_K + self.GENERAL_RULES_K
+                results = self.rules_db.similarity_search_by_vector_with_relevance_scores(
+                    query_vec,
+                    k=k,
+                    filter={"$or": [{"customer_id": customer_id}, {"rule_type": "general"}]}
+                )
+                customer_results = [(doc, score) for doc, score in results if doc.metadata.get("customer_id") == customer_id]
+                general_results = [(doc, score) for doc, score in results if doc.metadata.get("customer_id") != customer_id]
+                
+                # General rules can fill a full result set ahead of customer rules;
+                # only then fetch the missing customer rules on their own
+                if len(results) == k and len(customer_results) < self.CUSTOMER_RULES_K:
+                    customer_results = self.rules_db.similarity_search_by_vector_with_relevance_scores(
+                        query_vec,
+                        k=self.CUSTOMER_RULES_K,
+                        filter={"customer_id": customer_id}
+                    )
+                all_results = customer_results[:self.CUSTOMER_RULES_K] + general_results[:self.GENERAL_RULES_K]
+            else:
+                if self._general_rule_vec is None:
+                    self._general_rule_vec = self._embed_query(GENERAL_RULES_QUERY)
+                all_results = self.rules_db.similarity_search_by_vector_with_relevance_scores(
+                    self._general_rule_vec,
+                    k=self.GENERAL_RULES_K,
+                    filter={"rule_type": "general"}
                 )
-            
-            # Add general rules
-            general_results = self.rules_db.similarity_search_with_score(
-                "General business rules for quoting",
-                k=5,
-                filter={"rule_type": "general"}
-            )
-            
-            # Combine and format results
-            all_results = results + general_results if customer_id else general_results
             
             # Extract and format the rules
             business_rules = []
@@ -120,9 +233,6 @@ class VectorStore:
                 texts=[description],
                 metadatas=[project_data]
             )
-            
-            # Persist the changes
-            self.projects_db.persist()
             return True
         except Exception as e:
             self.logger.error(f"Error adding project to vector DB: {str(e)}")
@@ -164,8 +274,12 @@ class VectorStore:
             }
         ]
         
-        for project in sample_projects:
-            self.add_project(project)
+        # Embed and add all projects in one batch, persisting once
+        self.projects_db.add_texts(
+            texts=[project.get("project_description", "") for project in sample_projects],
+            metadatas=sample_projects
+        )
+        self.projects_db.persist()
         
         # Add business rules
         sample_rules = [
@@ -187,11 +301,10 @@ class VectorStore:
             }
         ]
         
-        for rule in sample_rules:
-            self.rules_db.add_texts(
-                texts=[rule["rule_description"]],
-                metadatas=[rule]
-            )
+        self.rules_db.add_texts(
+            texts=[rule["rule_description"] for rule in sample_rules],
+            metadatas=sample_rules
+        )
         
         # Persist all changes
         self.rules_db.persist()
@@ -1,12 +1,13 @@
 # generate_mock_data.py
 import os
 import json
-import random
-import csv
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import sqlite3
 
+from db.structured_db import SQL_CREATE_TABLES, SQL_CREATE_INDEXES
+
 # Ensure data directories exist
 os.makedirs("./data/vector_db/quotes", exist_ok=True)
 os.makedirs("./data/vector_db/projects", exist_ok=True)
@@ -39,6 +40,11 @@ MATERIALS = [
     {"name": "Industrial Fasteners", "unit": "boxes", "base_price": 35.00}
 ]
 
+# Parallel (column) views of MATERIALS for index-based sampling
+MAT_NAMES = [m["name"] for m in MATERIALS]
+MAT_UNITS = [m["unit"] for m in MATERIALS]
+MAT_PRICES = np.array([m["base_price"] for m in MATERIALS])
+
 PROJECT_TYPES = [
     {"type": "Custom Machining", "description_template": "Precision machining of {material} components for {industry} applications with tolerances of {tolerance}."},
     {"type": "Assembly System", "description_template": "Design and manufacturing of automated assembly systems for {product} production with a capacity of {capacity} units per hour."},
@@ -47,126 +53,139 @@ PROJECT_TYPES = [
     {"type": "Testing Apparatus", "description_template": "Design and fabrication of testing apparatus for {industry} with {feature} measurement capabilities."}
 ]
 
+# Bind each template's format once instead of looking it up per description
+for project_type in PROJECT_TYPES:
+    project_type["render_description"] = project_type["description_template"].format
+
 INDUSTRIES = ["aerospace", "automotive", "medical", "electronics", "energy", "defense", "consumer goods"]
 PRODUCTS = ["valves", "pumps", "controllers", "sensors", "actuators", "frames", "housings", "assemblies"]
 FEATURES = ["high-precision", "temperature-resistant", "corrosion-resistant", "lightweight", "high-strength", "miniaturized"]
 TOLERANCES = ["±0.01mm", "±0.05mm", "±0.1mm", "±0.005 inches", "±0.001 inches"]
 CAPACITIES = ["100-150", "250-300", "500-600", "1000+"]
 
+STATUS_WEIGHTS = {"accepted": 0.6, "rejected": 0.3, "pending": 0.1}
+STATUSES = list(STATUS_WEIGHTS.keys())
+STATUS_PROBS = list(STATUS_WEIGHTS.values())
+
+# Seeded NumPy generator for all sampling, so reruns produce the same mock data
+rng = np.random.default_rng(20240101)
+
+def pick(seq):
+    """Return a uniformly random element of seq."""
+    return seq[rng.integers(len(seq))]
+
+def rand_int(low, high):
+    """Return a random int in [low, high], inclusive like random.randint."""
+    return int(rng.integers(low, high + 1))
+
 # -----------------------------------------------------------
 # Generate SQLite database with quotes and customer data
 # -----------------------------------------------------------
 
 print("Generating structured database...")
 
-conn = sqlite3.connect("./data/structured_db/quotes.db")
+# On-disk database, in WAL with relaxed syncing for the final write-back
+disk_conn = sqlite3.connect("./data/structured_db/quotes.db")
+disk_conn.executescript("""
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+""")
+
+# Stage the load in memory, starting from a copy of whatever is already on disk.
+# Autocommit mode; the bulk load below manages its own transaction
+conn = sqlite3.connect(":memory:", isolation_level=None)
+disk_conn.backup(conn)
 cursor = conn.cursor()
 
-# Create tables
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS quotes (
-    quote_id TEXT PRIMARY KEY,
-    customer_id TEXT NOT NULL,
-    project_name TEXT NOT NULL,
-    total_price REAL NOT NULL,
-    timestamp TEXT NOT NULL,
-    quote_data TEXT NOT NULL,
-    status TEXT DEFAULT 'pending'
-)
-''')
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS customers (
-    customer_id TEXT PRIMARY KEY,
-    customer_name TEXT NOT NULL,
-    industry TEXT,
-    relationship_length INTEGER,
-    credit_score INTEGER
-)
-''')
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS feedback (
-    feedback_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    quote_id TEXT NOT NULL,
-    feedback_text TEXT,
-    accepted BOOLEAN NOT NULL,
-    timestamp TEXT NOT NULL,
-    FOREIGN KEY (quote_id) REFERENCES quotes (quote_id)
-)
-''')
-
-# Insert customer data
-for customer in CUSTOMERS:
-    cursor.execute(
-        "INSERT OR REPLACE INTO customers (customer_id, customer_name, industry, relationship_length, credit_score) VALUES (?, ?, ?, ?, ?)",
-        (customer["id"], customer["name"], customer["industry"], customer["relationship_years"], customer["credit_score"])
-    )
+# In-memory temp store and a larger page cache for the bulk load, then create the
+# tables with StructuredDB's schema, all in one script
+cursor.executescript('''
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+''' + SQL_CREATE_TABLES)
+
+# Customer rows
+customer_rows = [
+    (c["id"], c["name"], c["industry"], c["relationship_years"], c["credit_score"])
+    for c in CUSTOMERS
+]
 
-# Generate quotes
+feedback_options = {
+    "accepted": [
+        "Your competitive pricing and detailed breakdown gave us confidence in your quote.",
+        "The timeline works well with our project schedule. We appreciate the detailed approach.",
+        "Your team's expertise in optimizing the manufacturing process was evident in the proposal.",
+        "The quote addressed all our technical requirements and offered good value.",
+        "We were impressed by the quality guarantees and service level agreement included."
+    ],
+    "rejected": [
+        "We found a more competitive price from another supplier.",
+        "The timeline was too long for our project needs.",
+        "Your material specifications didn't fully meet our technical requirements.",
+        "We decided to go with a supplier who has more experience in our specific industry.",
+        "The payment terms weren't flexible enough for our current cash flow situation."
+    ]
+}
+
+# One compact encoder reused for every quote payload
+encode_quote = json.JSONEncoder(separators=(",", ":")).encode
+
+# Generate quotes, collecting quote and feedback rows for a bulk insert
 quotes = []
+quote_rows = []
+feedback_rows = []
 for i in range(1, 51):
     # Select a random customer
-    customer = random.choice(CUSTOMERS)
+    customer = pick(CUSTOMERS)
     
     # Select a random project type
-    project_type = random.choice(PROJECT_TYPES)
+    project_type = pick(PROJECT_TYPES)
     
     # Generate a description using the template
-    description = project_type["description_template"].format(
-        material=random.choice(MATERIALS)["name"],
-        industry=random.choice(INDUSTRIES),
-        product=random.choice(PRODUCTS),
-        feature=random.choice(FEATURES),
-        tolerance=random.choice(TOLERANCES),
-        capacity=random.choice(CAPACITIES)
+    description = project_type["render_description"](
+        material=pick(MAT_NAMES),
+        industry=pick(INDUSTRIES),
+        product=pick(PRODUCTS),
+        feature=pick(FEATURES),
+        tolerance=pick(TOLERANCES),
+        capacity=pick(CAPACITIES)
     )
     
-    # Generate random materials for the quote
-    quote_materials = []
-    num_materials = random.randint(3, 8)
-    for j in range(num_materials):
-        material = random.choice(MATERIALS)
-        quantity = random.randint(5, 500)
-        quote_materials.append({
-            "name": material["name"],
-            "quantity": quantity,
-            "unit": material["unit"],
-            "unit_price": material["base_price"] * random.uniform(0.9, 1.1),
-            "total": quantity * material["base_price"] * random.uniform(0.9, 1.1)
-        })
+    # Generate random materials for the quote as parallel arrays, sampling all lines at once
+    num_materials = rand_int(3, 8)
+    idxs = rng.integers(0, len(MATERIALS), num_materials)
+    base_prices = MAT_PRICES[idxs]
+    quantities = rng.integers(5, 501, num_materials)
+    unit_prices = base_prices * rng.uniform(0.9, 1.1, num_materials)
+    totals = quantities * base_prices * rng.uniform(0.9, 1.1, num_materials)
+    materials_total = float(totals.sum())
     
     # Calculate labor costs
-    labor_hours = random.randint(80, 1000)
-    labor_rate = random.uniform(75, 120)
+    labor_hours = rand_int(80, 1000)
+    labor_rate = rng.uniform(75, 120)
     labor_cost = labor_hours * labor_rate
     
     # Calculate equipment costs
-    equipment_cost = random.uniform(0.1, 0.3) * sum(m["total"] for m in quote_materials)
+    equipment_cost = rng.uniform(0.1, 0.3) * materials_total
     
     # Calculate overhead
-    overhead_rate = random.uniform(0.15, 0.25)
-    overhead_cost = overhead_rate * (sum(m["total"] for m in quote_materials) + labor_cost)
+    overhead_rate = rng.uniform(0.15, 0.25)
+    overhead_cost = overhead_rate * (materials_total + labor_cost)
     
     # Calculate profit margin
-    margin_rate = random.uniform(0.18, 0.35)
-    costs = sum(m["total"] for m in quote_materials) + labor_cost + equipment_cost + overhead_cost
+    margin_rate = rng.uniform(0.18, 0.35)
+    costs = materials_total + labor_cost + equipment_cost + overhead_cost
     profit_margin = costs * margin_rate / (1 - margin_rate)
     
     # Calculate total price
     total_price = costs + profit_margin
     
     # Generate quote timestamp (random date in last 180 days)
-    days_ago = random.randint(1, 180)
+    days_ago = rand_int(1, 180)
     quote_date = datetime.now() - timedelta(days=days_ago)
     
     # Determine status (weighted random)
-    status_weights = {"accepted": 0.6, "rejected": 0.3, "pending": 0.1}
-    status = random.choices(
-        list(status_weights.keys()),
-        weights=list(status_weights.values()),
-        k=1
-    )[0]
+    status = STATUSES[rng.choice(len(STATUSES), p=STATUS_PROBS)]
     
     # Create quote data
     quote_id = f"QG-{quote_date.strftime('%Y%m%d')}-{i:04d}"
@@ -174,75 +193,80 @@ for i in range(1, 51):
     quote_data = {
         "quote_id": quote_id,
         "customer_id": customer["id"],
-        "project_name": f"{project_type['type']} - {random.choice(PRODUCTS).capitalize()} {random.randint(100, 999)}",
+        "project_name": f"{project_type['type']} - {pick(PRODUCTS).capitalize()} {rand_int(100, 999)}",
         "project_description": description,
         "total_price": total_price,
         "timestamp": quote_date.isoformat(),
-        "materials": quote_materials,
+        # Line items are only materialized as dicts for the JSON payload
+        "materials": [
+            {"name": MAT_NAMES[idx], "quantity": quantity, "unit": MAT_UNITS[idx], "unit_price": unit_price, "total": total}
+            for idx, quantity, unit_price, total in zip(idxs.tolist(), quantities.tolist(), unit_prices.tolist(), totals.tolist())
+        ],
         "labor": {
             "hours": labor_hours,
             "rate": labor_rate,
             "total": labor_cost
         },
         "breakdown": {
-            "materials": sum(m["total"] for m in quote_materials),
+            "materials": materials_total,
             "labor": labor_cost,
             "equipment": equipment_cost,
             "overhead": overhead_cost,
             "profit_margin": profit_margin
         },
-        "confidence_score": random.randint(75, 98),
+        "confidence_score": rand_int(75, 98),
         "status": status
     }
     
-    # Insert into database
-    cursor.execute(
-        "INSERT INTO quotes (quote_id, customer_id, project_name, total_price, timestamp, quote_data, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (
-            quote_id,
-            customer["id"],
-            quote_data["project_name"],
-            total_price,
-            quote_date.isoformat(),
-            json.dumps(quote_data),
-            status
-        )
-    )
+    quote_rows.append((
+        quote_id,
+        customer["id"],
+        quote_data["project_name"],
+        total_price,
+        quote_date.isoformat(),
+        encode_quote(quote_data),
+        status
+    ))
     
     # Add feedback for non-pending quotes
     if status != "pending":
-        feedback_options = {
-            "accepted": [
-                "Your competitive pricing and detailed breakdown gave us confidence in your quote.",
-                "The timeline works well with our project schedule. We appreciate the detailed approach.",
-                "Your team's expertise in optimizing the manufacturing process was evident in the proposal.",
-                "The quote addressed all our technical requirements and offered good value.",
-                "We were impressed by the quality guarantees and service level agreement included."
-            ],
-            "rejected": [
-                "We found a more competitive price from another supplier.",
-                "The timeline was too long for our project needs.",
-                "Your material specifications didn't fully meet our technical requirements.",
-                "We decided to go with a supplier who has more experience in our specific industry.",
-                "The payment terms weren't flexible enough for our current cash flow situation."
-            ]
-        }
-        
-        feedback_text = random.choice(feedback_options[status])
-        
-        cursor.execute(
-            "INSERT INTO feedback (quote_id, feedback_text, accepted, timestamp) VALUES (?, ?, ?, ?)",
-            (
-                quote_id,
-                feedback_text,
-                status == "accepted",
-                quote_date.isoformat()
-            )
-        )
+        feedback_rows.append((
+            quote_id,
+            pick(feedback_options[status]),
+            status == "accepted",
+            quote_date.isoformat()
+        ))
     
     quotes.append(quote_data)
-    
-conn.commit()
+
+# Run all inserts in one transaction so SQLite syncs to disk once
+cursor.execute("BEGIN")
+cursor.executemany(
+    "INSERT OR REPLACE INTO customers (customer_id, customer_name, industry, relationship_length, credit_score) VALUES (?, ?, ?, ?, ?)",
+    customer_rows
+)
+# Mock quote IDs embed a date relative to today, so a rerun on another day produces
+# different IDs; drop the previous mock quotes ("QG-" IDs) and their feedback first.
+# Quotes created by the app have UUID IDs and are kept.
+cursor.execute("DELETE FROM feedback WHERE quote_id GLOB 'QG-*'")
+cursor.execute("DELETE FROM quotes WHERE quote_id GLOB 'QG-*'")
+cursor.executemany(
+    "INSERT INTO quotes (quote_id, customer_id, project_name, total_price, timestamp, quote_data, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    quote_rows
+)
+cursor.executemany(
+    "INSERT INTO feedback (quote_id, feedback_text, accepted, timestamp) VALUES (?, ?, ?, ?)",
+    feedback_rows
+)
+cursor.execute("COMMIT")
+
+# Build StructuredDB's secondary indexes once the data is in, rather than updating them per row
+cursor.executescript(SQL_CREATE_INDEXES)
+
+# Write the staged database back to disk in a single backup pass
+conn.backup(disk_conn)
+conn.close()
+disk_conn.close()
 
 print(f"Added {len(quotes)} quotes to the database")
 
@@ -252,79 +276,69 @@ print(f"Added {len(quotes)} quotes to the database")
 
 print("Generating CSV files...")
 
-# Historical quotes summary
-historical_quotes = []
-for i in range(1, 201):  # Generate 200 historical quotes
-    quote_date = datetime.now() - timedelta(days=random.randint(180, 730))  # 6 months to 2 years ago
-    customer = random.choice(CUSTOMERS)
-    
-    # Determine outcome (weighted random)
-    won = random.random() < 0.65
-    
-    # Calculate some realistic values
-    material_cost = random.uniform(15000, 200000)
-    labor_cost = random.uniform(10000, 150000)
-    overhead = random.uniform(5000, 50000)
-    margin = random.uniform(0.15, 0.35)
-    total_cost = material_cost + labor_cost + overhead
-    quoted_price = total_cost / (1 - margin)
-    
-    # Response time in days
-    response_time = random.randint(1, 10)
-    
-    historical_quotes.append({
-        "quote_id": f"HIST-{quote_date.strftime('%Y%m%d')}-{i:04d}",
-        "date": quote_date.strftime("%Y-%m-%d"),
-        "customer_name": customer["name"],
-        "customer_id": customer["id"],
-        "industry": customer["industry"],
-        "project_type": random.choice(PROJECT_TYPES)["type"],
-        "quoted_price": quoted_price,
-        "material_cost": material_cost,
-        "labor_cost": labor_cost,
-        "overhead": overhead,
-        "margin_percentage": margin * 100,
-        "response_time_days": response_time,
-        "won": won,
-        "reason_if_lost": "" if won else random.choice([
-            "Price too high", "Timeline issues", "Technical requirements", 
-            "Competitor relationship", "Budget constraints"
-        ])
-    })
+# Rows per write batch, so larger mock volumes stream to disk instead of being formatted in one go
+CSV_CHUNK_ROWS = 10000
+
+# Historical quotes summary, drawn column-wise for 200 quotes
+n_historical = 200
+quote_dates = pd.Series(pd.Timestamp.now() - pd.to_timedelta(rng.integers(180, 731, n_historical), unit="D"))  # 6 months to 2 years ago
+customer_idx = rng.integers(0, len(CUSTOMERS), n_historical)
+
+# Determine outcome (weighted random)
+won = rng.random(n_historical) < 0.65
+
+# Calculate some realistic values
+material_cost = rng.uniform(15000, 200000, n_historical)
+labor_cost = rng.uniform(10000, 150000, n_historical)
+overhead = rng.uniform(5000, 50000, n_historical)
+margin = rng.uniform(0.15, 0.35, n_historical)
+quoted_price = (material_cost + labor_cost + overhead) / (1 - margin)
+
+loss_reasons = rng.choice([
+    "Price too high", "Timeline issues", "Technical requirements",
+    "Competitor relationship", "Budget constraints"
+], n_historical)
+
+historical_quotes = pd.DataFrame({
+    "quote_id": "HIST-" + quote_dates.dt.strftime("%Y%m%d") + "-" + pd.Series(np.arange(1, n_historical + 1)).astype(str).str.zfill(4),
+    "date": quote_dates.dt.strftime("%Y-%m-%d"),
+    "customer_name": np.array([c["name"] for c in CUSTOMERS])[customer_idx],
+    "customer_id": np.array([c["id"] for c in CUSTOMERS])[customer_idx],
+    "industry": np.array([c["industry"] for c in CUSTOMERS])[customer_idx],
+    "project_type": rng.choice([p["type"] for p in PROJECT_TYPES], n_historical),
+    "quoted_price": quoted_price,
+    "material_cost": material_cost,
+    "labor_cost": labor_cost,
+    "overhead": overhead,
+    "margin_percentage": margin * 100,
+    "response_time_days": rng.integers(1, 11, n_historical),  # Response time in days
+    "won": won,
+    "reason_if_lost": np.where(won, "", loss_reasons)
+})
 
 # Write to CSV
-with open("./data/mock_files/historical_quotes.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=historical_quotes[0].keys())
-    writer.writeheader()
-    writer.writerows(historical_quotes)
-
-# Generate material pricing history
-materials_history = []
-for material in MATERIALS:
-    base_price = material["base_price"]
-    
-    # Generate monthly prices for the last 24 months
-    for i in range(24, 0, -1):
-        month_date = datetime.now().replace(day=1) - timedelta(days=30*i)
-        
-        # Add some trend and volatility
-        trend_factor = 1 + (0.005 * (24-i))  # Slight upward trend
-        volatility = random.uniform(-0.05, 0.08)
-        
-        price = base_price * trend_factor * (1 + volatility)
-        
-        materials_history.append({
-            "material": material["name"],
-            "date": month_date.strftime("%Y-%m-%d"),
-            "price_per_unit": price,
-            "unit": material["unit"]
-        })
+historical_quotes.to_csv("./data/mock_files/historical_quotes.csv", index=False, chunksize=CSV_CHUNK_ROWS)
+
+# Generate material pricing history: monthly prices for the last 24 months,
+# one row per (material, month) in material-major order
+n_months = 24
+month_offsets = np.arange(n_months, 0, -1)
+month_dates = (pd.Timestamp.now().normalize().replace(day=1) - pd.to_timedelta(30 * month_offsets, unit="D")).strftime("%Y-%m-%d")
+
+# Add some trend and volatility
+trend_factor = 1 + 0.005 * (n_months - month_offsets)  # Slight upward trend
+volatility = rng.uniform(-0.05, 0.08, (len(MATERIALS), n_months))
+prices = MAT_PRICES[:, None] * trend_factor[None, :] * (1 + volatility)
+
+materials_history = pd.DataFrame({
+    "material": np.repeat(MAT_NAMES, n_months),
+    "date": np.tile(month_dates, len(MATERIALS)),
+    "price_per_unit": prices.ravel(),
+    "unit": np.repeat(MAT_UNITS, n_months)
+})
 
 # Write to CSV
-with open("./data/mock_files/material_pricing_history.csv", "w", newline="") as f:
-    writer = csv.DictWriter(f, fieldnames=materials_history[0].keys())
-    writer.writeheader()
-    writer.writerows(materials_history)
+materials_history.to_csv("./data/mock_files/material_pricing_history.csv", index=False, chunksize=CSV_CHUNK_ROWS)
 
 # -----------------------------------------------------------
 # Generate sample project specification PDFs (mock content)
@@ -334,53 +348,53 @@ print("Generating mock specification documents...")
 
 # Just create text files with mock content instead of actual PDFs
 for i in range(1, 6):
-    project_type = random.choice(PROJECT_TYPES)
-    material = random.choice(MATERIALS)["name"]
-    industry = random.choice(INDUSTRIES)
-    product = random.choice(PRODUCTS)
+    project_type = pick(PROJECT_TYPES)
+    material = pick(MAT_NAMES)
+    industry = pick(INDUSTRIES)
+    product = pick(PRODUCTS)
     
     spec_content = f"""
 TECHNICAL SPECIFICATION DOCUMENT
 ===============================
 
-Project: {project_type['type']} - {product.capitalize()} {random.randint(100, 999)}
-Client: {random.choice(CUSTOMERS)['name']}
-Date: {(datetime.now() - timedelta(days=random.randint(10, 90))).strftime('%Y-%m-%d')}
+Project: {project_type['type']} - {product.capitalize()} {rand_int(100, 999)}
+Client: {pick(CUSTOMERS)['name']}
+Date: {(datetime.now() - timedelta(days=rand_int(10, 90))).strftime('%Y-%m-%d')}
 
 1. SCOPE
 --------
-{project_type['description_template'].format(
+{project_type['render_description'](
     material=material,
     industry=industry,
     product=product,
-    feature=random.choice(FEATURES),
-    tolerance=random.choice(TOLERANCES),
-    capacity=random.choice(CAPACITIES)
+    feature=pick(FEATURES),
+    tolerance=pick(TOLERANCES),
+    capacity=pick(CAPACITIES)
 )}
 
 2. MATERIAL REQUIREMENTS
 -----------------------
 Primary Material: {material}
-Quantity Required: {random.randint(50, 500)} {random.choice(['kg', 'units', 'sqm'])}
+Quantity Required: {rand_int(50, 500)} {pick(['kg', 'units', 'sqm'])}
 Specifications: 
-- {random.choice(['Heat treated', 'Anodized', 'Cold rolled', 'Tempered', 'Galvanized'])}
-- {random.choice(['Grade A', 'Commercial grade', 'Military spec', 'Aerospace grade', 'Medical grade'])}
-- Surface finish: {random.choice(['Polished', 'Brushed', 'Satin', 'Matte', 'High gloss'])}
+- {pick(['Heat treated', 'Anodized', 'Cold rolled', 'Tempered', 'Galvanized'])}
+- {pick(['Grade A', 'Commercial grade', 'Military spec', 'Aerospace grade', 'Medical grade'])}
+- Surface finish: {pick(['Polished', 'Brushed', 'Satin', 'Matte', 'High gloss'])}
 
 3. MANUFACTURING REQUIREMENTS
 ----------------------------
-Tolerances: {random.choice(TOLERANCES)}
-Production Volume: {random.randint(100, 10000)} units
-Quality Control: {random.choice(['ISO 9001', 'AS9100', 'ISO 13485', 'IATF 16949'])} standards apply
+Tolerances: {pick(TOLERANCES)}
+Production Volume: {rand_int(100, 10000)} units
+Quality Control: {pick(['ISO 9001', 'AS9100', 'ISO 13485', 'IATF 16949'])} standards apply
 
 4. TIMELINE
 ----------
-Lead Time Required: {random.randint(2, 12)} weeks
-Delivery Schedule: {random.choice(['Single delivery', 'Phased delivery', 'Just-in-time delivery'])}
+Lead Time Required: {rand_int(2, 12)} weeks
+Delivery Schedule: {pick(['Single delivery', 'Phased delivery', 'Just-in-time delivery'])}
 
 5. SPECIAL INSTRUCTIONS
 ---------------------
-{random.choice([
+{pick([
     "Parts must be individually wrapped and labeled",
     "Temperature-controlled shipping required",
     "Certificate of conformance required for each batch",
@@ -389,7 +403,7 @@ Delivery Schedule: {random.choice(['Single delivery', 'Phased delivery', 'Just-i
 ])}
 
 APPROVED BY:
-{random.choice(['J. Smith', 'R. Johnson', 'A. Williams', 'L. Brown', 'M. Jones'])}
+{pick(['J. Smith', 'R. Johnson', 'A. Williams', 'L. Brown', 'M. Jones'])}
 Engineering Manager
 """
 
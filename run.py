@@ -1,28 +1,75 @@
 # run.py
 import os
+import sys
+import selectors
+import socket
 import subprocess
+import threading
 import time
 import argparse
+import hashlib
 import webbrowser
-from threading import Thread
 
-def run_command(command, name=None):
-    """Run a command in a subprocess."""
-    process = subprocess.Popen(
-        command,
+MOCK_DATA_SCRIPT = "generate_mock_data.py"
+MOCK_DATA_HASH_FILE = "./data/.mockdata_hash"
+MOCK_DB_PATH = "./data/structured_db/quotes.db"
+
+def run_command(command):
+    """Run a command in a subprocess, letting it write straight to our terminal."""
+    return subprocess.run(command, shell=True).returncode
+
+def start_command(args, env=None):
+    """Start a program in a subprocess with its output piped back to us."""
+    return subprocess.Popen(
+        args,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        universal_newlines=True,
-        shell=True
+        env=env
     )
+
+def forward_output(named_processes):
+    """
+    Relay the output of several subprocesses from a single thread, prefixing
+    each line with the name of the process it came from. Returns once all exit.
+    """
+    selector = selectors.DefaultSelector()
+    for name, process in named_processes:
+        # Per-pipe state: [prefix, trailing bytes of an unfinished line]
+        selector.register(process.stdout, selectors.EVENT_READ, [f"[{name}] ".encode(), b""])
     
-    prefix = f"[{name}] " if name else ""
-    
-    for line in process.stdout:
-        print(f"{prefix}{line}", end="")
+    out = sys.stdout.buffer
+    while selector.get_map():
+        for key, _ in selector.select():
+            prefix, partial = key.data
+            chunk = os.read(key.fd, 65536)
+            if not chunk:
+                if partial:
+                    out.write(prefix + partial + b"\n")
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                continue
+            
+            # Only emit complete lines so output from different processes doesn't interleave mid-line
+            *lines, key.data[1] = (partial + chunk).split(b"\n")
+            for line in lines:
+                out.write(prefix + line + b"\n")
+        out.flush()
     
-    process.wait()
-    return process.returncode
+    selector.close()
+    for _, process in named_processes:
+        process.wait()
+
+def stop_processes(processes, timeout=10):
+    """Terminate subprocesses that are still running, killing any that don't exit in time."""
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
 
 def setup_environment():
     """Set up the environment."""
@@ -38,54 +85,92 @@ def setup_environment():
     print("Installing requirements...")
     run_command("pip install -r requirements.txt")
     
-    # Generate mock data
-    print("Generating mock data...")
-    run_command("python generate_mock_data.py")
+    # Generate mock data, unless the generator is unchanged since the last successful run
+    with open(MOCK_DATA_SCRIPT, "rb") as f:
+        script_hash = hashlib.sha256(f.read()).hexdigest()
+    
+    stored_hash = None
+    if os.path.exists(MOCK_DATA_HASH_FILE):
+        with open(MOCK_DATA_HASH_FILE) as f:
+            stored_hash = f.read().strip()
+    
+    if stored_hash == script_hash and os.path.exists(MOCK_DB_PATH):
+        print("Mock data is up to date, skipping generation")
+    else:
+        print("Generating mock data...")
+        if run_command(f"python {MOCK_DATA_SCRIPT}") == 0:
+            with open(MOCK_DATA_HASH_FILE, "w") as f:
+                f.write(script_hash)
+
+def wait_for_port(host, port, timeout=30):
+    """Poll until something accepts TCP connections on host:port. Returns False on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.1):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
 
-def run_api_server():
-    """Run the FastAPI server."""
+def start_api_server(dev=False):
+    """Start the FastAPI server, with auto-reload in dev mode."""
     print("Starting API server...")
-    run_command("uvicorn app:app --host 0.0.0.0 --port 8000 --reload", name="API")
+    env = {**os.environ}
+    if dev:
+        env["DEV"] = "1"
+    # app.py runs the one-shot data preparation before handing off to uvicorn
+    return start_command([sys.executable, "app.py"], env=env)
 
-def run_streamlit_app():
-    """Run the Streamlit app."""
+def start_streamlit_app():
+    """Start the Streamlit app."""
     print("Starting Streamlit app...")
-    run_command("streamlit run app_ui.py", name="UI")
+    return start_command([sys.executable, "-m", "streamlit", "run", "app_ui.py"])
 
 def main():
     parser = argparse.ArgumentParser(description="Run the QuoteGenius application")
     parser.add_argument("--skip-setup", action="store_true", help="Skip environment setup")
     parser.add_argument("--ui-only", action="store_true", help="Run only the UI in demo mode")
+    parser.add_argument("--dev", action="store_true", help="Run the API server with auto-reload")
     args = parser.parse_args()
     
     if not args.skip_setup:
         setup_environment()
     
-    if args.ui_only:
-        print("Running in UI-only demo mode...")
-        run_streamlit_app()
-    else:
-        # Run API and UI in separate threads
-        api_thread = Thread(target=run_api_server)
-        ui_thread = Thread(target=run_streamlit_app)
-        
-        api_thread.daemon = True
-        ui_thread.daemon = True
-        
-        api_thread.start()
-        time.sleep(5)  # Wait for API to start before launching UI
-        ui_thread.start()
-        
-        # Open browser
-        time.sleep(3)
-        webbrowser.open("http://localhost:8501")
-        
-        try:
-            # Keep the main thread alive
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\nShutting down...")
+    processes = []
+    try:
+        if args.ui_only:
+            print("Running in UI-only demo mode...")
+            processes.append(start_streamlit_app())
+            forward_output([("UI", processes[0])])
+        else:
+            api_process = start_api_server(dev=args.dev)
+            processes.append(api_process)
+            ui_process = start_streamlit_app()
+            processes.append(ui_process)
+            
+            # Relay both servers' output from one supervisor thread right away, so
+            # startup logs and errors show up and full pipes never block a server
+            relay = threading.Thread(
+                target=forward_output,
+                args=([("API", api_process), ("UI", ui_process)],),
+                daemon=True
+            )
+            relay.start()
+            
+            # Wait for the API, then open the browser once Streamlit is listening
+            if not wait_for_port("127.0.0.1", 8000):
+                print("API server did not start listening on port 8000 in time")
+            if wait_for_port("127.0.0.1", 8501):
+                webbrowser.open("http://localhost:8501")
+            else:
+                print("Streamlit did not start listening on port 8501 in time")
+            
+            relay.join()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        stop_processes(processes)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
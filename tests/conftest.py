@@ -0,0 +1,74 @@
+# tests/conftest.py
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Chat model clients are built at import time and need a key, but never call out here
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+class FakeLLM:
+    """
+    Stand-in chat model returning canned responses in order (the last one
+    repeats) and recording every prompt it was sent.
+    """
+
+    def __init__(self, *responses: str):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def _respond(self, prompt) -> str:
+        self.prompts.append(prompt)
+        return self.responses[min(len(self.prompts), len(self.responses)) - 1]
+
+    def invoke(self, prompt):
+        return SimpleNamespace(content=self._respond(prompt))
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+    async def astream(self, prompt):
+        # Split into small chunks so streamed parsing sees partial values
+        text = self._respond(prompt)
+        for start in range(0, len(text), 7):
+            yield SimpleNamespace(content=text[start:start + 7])
+
+class FakeVectorStore:
+    """Stand-in VectorStore serving fixed business rules."""
+
+    def __init__(self, rules=None):
+        self.rules = rules or []
+        self.rule_queries = []
+
+    def get_business_rules(self, customer_id=None):
+        self.rule_queries.append(customer_id)
+        return [dict(rule) for rule in self.rules]
+
+    def index_successful_quotes(self, quotes):
+        pass
+
+class WhitespaceEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per word."""
+
+    def encode_batch(self, texts):
+        return [text.split() for text in texts]
+
+@pytest.fixture(autouse=True)
+def offline_token_counts(monkeypatch):
+    """Keep PromptTokenCounter from downloading tiktoken encodings."""
+    monkeypatch.setattr("agents._llm.tiktoken.encoding_for_model", lambda model: WhitespaceEncoding())
+
+@pytest.fixture
+def structured_db(tmp_path, monkeypatch):
+    """A StructuredDB on an empty database file under tmp_path."""
+    from db.structured_db import StructuredDB
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SEED_DB", "false")
+    db = StructuredDB()
+    yield db
+    db.conn.close()
+    db.ro_conn.close()
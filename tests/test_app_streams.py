@@ -0,0 +1,102 @@
+# tests/test_app_streams.py
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import FakeLLM, FakeVectorStore, WhitespaceEncoding
+
+QUOTE_REQUEST = {
+    "customer_id": "cust-101",
+    "project_name": "Bracket run",
+    "project_description": "CNC-machined aluminum brackets",
+    "materials": [{"name": "Aluminum", "quantity": 500}]
+}
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    """
+    Import app.py against an empty database and a stub vector store. The
+    CrewAI agents the coordinator builds at import time aren't used by the
+    stream endpoints, so they are stubbed too.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("app"))
+        mp.setenv("SEED_DB", "false")
+        mp.setattr("agents._llm.tiktoken.encoding_for_model", lambda model: WhitespaceEncoding())
+        mp.setattr("db.vector_store.VectorStore", FakeVectorStore)
+        mp.setattr("agents.coordinator.Agent", lambda **kwargs: kwargs)
+
+        import app
+        yield app
+
+@pytest.fixture
+def client(app_module):
+    with TestClient(app_module.app) as client:
+        yield client
+
+def read_events(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [orjson.loads(line) for line in response.iter_lines() if line]
+
+def test_analyze_project_stream_sends_each_field(app_module, client, monkeypatch):
+    analysis = {
+        "complexity": "medium",
+        "key_requirements": ["Anodized finish", "±0.05 mm tolerance"],
+        "risk_factors": {"supply": "low"}
+    }
+    monkeypatch.setattr(app_module.data_analyst, "llm", FakeLLM(orjson.dumps(analysis).decode()))
+
+    with client.stream("POST", "/analyze-project/stream", json=QUOTE_REQUEST) as response:
+        events = read_events(response)
+
+    assert events == [
+        {"event": "field", "name": name, "value": value} for name, value in analysis.items()
+    ] + [{"event": "done"}]
+
+def test_analyze_project_stream_reports_errors_as_events(app_module, client, monkeypatch):
+    class FailingLLM(FakeLLM):
+        async def astream(self, prompt):
+            yield FakeLLM('{"complexity": "high"').invoke(prompt)
+            raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(app_module.data_analyst, "llm", FailingLLM())
+
+    with client.stream("POST", "/analyze-project/stream", json=QUOTE_REQUEST) as response:
+        events = read_events(response)
+
+    assert events == [{"event": "error", "detail": "model unavailable"}]
+
+def test_generate_quote_stream_frames_coordinator_events(app_module, client, monkeypatch):
+    received = []
+
+    async def astream_quote_request(request_data):
+        received.append(request_data)
+        yield {"event": "token", "text": '{"total_price":'}
+        yield {"event": "quote", "quote": {"quote_id": "QG-1", "total_price": 1200.0}}
+        yield {"event": "final", "quote": {"quote_id": "QG-1", "total_price": 1140.0}}
+        yield {"event": "done", "quote_id": "QG-1"}
+
+    monkeypatch.setattr(app_module.coordinator, "astream_quote_request", astream_quote_request)
+
+    with client.stream("POST", "/generate-quote/stream", json=QUOTE_REQUEST) as response:
+        events = read_events(response)
+
+    assert [event["event"] for event in events] == ["token", "quote", "final", "done"]
+    assert events[2]["quote"]["total_price"] == 1140.0
+    assert received[0]["customer_id"] == "cust-101"
+
+def test_generate_quote_stream_reports_errors_as_events(app_module, client, monkeypatch):
+    async def astream_quote_request(request_data):
+        yield {"event": "token", "text": "{"}
+        raise ValueError("quote generation failed")
+
+    monkeypatch.setattr(app_module.coordinator, "astream_quote_request", astream_quote_request)
+
+    with client.stream("POST", "/generate-quote/stream", json=QUOTE_REQUEST) as response:
+        events = read_events(response)
+
+    assert events == [
+        {"event": "token", "text": "{"},
+        {"event": "error", "detail": "quote generation failed"}
+    ]
@@ -0,0 +1,98 @@
+# tests/test_knowledge_base.py
+import asyncio
+
+from agents.knowledge_base import KnowledgeBaseAgent
+from conftest import FakeLLM, FakeVectorStore
+
+def make_quote(**overrides):
+    # Two cost categories, so recommendations always go through the LLM
+    quote = {
+        "quote_id": "QG-1",
+        "timestamp": "2025-04-01T10:00:00",
+        "customer_id": "cust-101",
+        "total_price": 10_000,
+        "breakdown": {"materials": 6_000, "labor": 4_000},
+        "materials": [{"name": "Steel", "quantity": 10}],
+        "confidence_score": 85
+    }
+    quote.update(overrides)
+    return quote
+
+def test_recommendations_reused_for_identical_quote_details():
+    llm = FakeLLM("- Offer volume pricing")
+    agent = KnowledgeBaseAgent(FakeVectorStore(), llm)
+
+    first = agent.generate_recommendations(make_quote())
+    second = agent.generate_recommendations(make_quote(quote_id="QG-2", timestamp="2025-04-02T10:00:00"))
+
+    assert first == second == ["Offer volume pricing"]
+    assert len(llm.prompts) == 1
+
+def test_recommendations_not_shared_across_prices():
+    llm = FakeLLM("- Advice for $10,000", "- Advice for $19,999")
+    agent = KnowledgeBaseAgent(FakeVectorStore(), llm)
+
+    assert agent.generate_recommendations(make_quote(total_price=10_000)) == ["Advice for $10,000"]
+    assert agent.generate_recommendations(make_quote(total_price=19_999)) == ["Advice for $19,999"]
+    assert len(llm.prompts) == 2
+
+def test_recommendation_prompt_leaves_out_volatile_fields():
+    llm = FakeLLM("- Advice")
+    agent = KnowledgeBaseAgent(FakeVectorStore(), llm)
+
+    agent.generate_recommendations(make_quote(quote_id="QG-unique-id"))
+
+    assert "QG-unique-id" not in llm.prompts[0]
+    assert "cust-101" in llm.prompts[0]
+
+def test_cached_recommendations_cannot_be_mutated():
+    llm = FakeLLM("- First\n- Second")
+    agent = KnowledgeBaseAgent(FakeVectorStore(), llm)
+
+    agent.generate_recommendations(make_quote()).append("Injected")
+    cached = asyncio.run(agent.agenerate_recommendations(make_quote()))
+    cached.clear()
+
+    assert agent.generate_recommendations(make_quote()) == ["First", "Second"]
+    assert len(llm.prompts) == 1
+
+def test_business_rules_cached_per_customer_as_copies():
+    vector_db = FakeVectorStore([
+        {"rule_id": "r1", "rule_type": "general", "rule_description": "Markup 15%", "relevance_score": 0.2}
+    ])
+    agent = KnowledgeBaseAgent(vector_db, FakeLLM())
+
+    rules = agent.get_business_rules("cust-101")
+    rules["general"][0]["description"] = "Changed"
+    rules["general"].clear()
+
+    again = agent.get_business_rules("cust-101")
+    assert again == {"general": [{"rule_id": "r1", "description": "Markup 15%", "relevance_score": 0.2}]}
+    assert vector_db.rule_queries == ["cust-101"]
+
+    agent.get_business_rules("cust-102")
+    assert vector_db.rule_queries == ["cust-101", "cust-102"]
+
+def test_rule_based_recommendations_rank_customer_rules_then_by_distance():
+    agent = KnowledgeBaseAgent(FakeVectorStore(), FakeLLM())
+    business_rules = {
+        "general": [
+            {"rule_id": f"g{i}", "description": f"general {i}", "relevance_score": distance}
+            for i, distance in enumerate([0.9, 0.1, 0.5, 0.3, 0.7, 0.8])
+        ],
+        "customer-specific": [
+            {"rule_id": "c0", "description": "customer far", "relevance_score": 0.6},
+            {"rule_id": "c1", "description": "customer near", "relevance_score": 0.4}
+        ]
+    }
+
+    recommendations = agent._rule_based_recommendations(business_rules)
+
+    # Lower distance is more relevant; only the top five rules are kept
+    assert recommendations[1:] == [
+        "Confirm the quote follows: customer near",
+        "Confirm the quote follows: customer far",
+        "Confirm the quote follows: general 1",
+        "Confirm the quote follows: general 3",
+        "Confirm the quote follows: general 2"
+    ]
@@ -0,0 +1,110 @@
+# tests/test_structured_db.py
+
+def store(db, quote_id, customer_id, total_price, timestamp, **extra):
+    assert db.store_quote({
+        "quote_id": quote_id,
+        "customer_id": customer_id,
+        "project_name": f"Project {quote_id}",
+        "total_price": total_price,
+        "timestamp": timestamp,
+        **extra
+    })
+
+def seed(db):
+    store(db, "Q1", "cust-101", 40_000.0, "2025-01-10T09:00:00")
+    store(db, "Q2", "cust-101", 120_000.0, "2025-02-10T09:00:00")
+    store(db, "Q3", "cust-101", 80_000.0, "2025-02-20T09:00:00")
+    store(db, "Q4", "cust-102", 600_000.0, "2025-02-25T09:00:00")
+    db.record_feedback("Q1", "Good price", True)
+    db.record_feedback("Q2", "Too slow", False)
+    db.record_feedback("Q4", "Great", True)
+
+def test_quote_analytics(structured_db):
+    seed(structured_db)
+
+    analytics = structured_db.get_quote_analytics()
+
+    assert analytics["total_quotes"] == 4
+    assert analytics["status_distribution"] == {"accepted": 2, "rejected": 1, "pending": 1}
+    assert analytics["avg_prices_by_status"]["accepted"] == 320_000.0
+    assert analytics["win_rate"] == 0.5
+
+    monthly = {row["month"]: row for row in analytics["monthly_trends"]}
+    assert monthly["2025-01"]["quote_count"] == 1
+    assert monthly["2025-01"]["accepted_count"] == 1
+    assert monthly["2025-02"]["quote_count"] == 3
+    assert monthly["2025-02"]["avg_price"] == 800_000.0 / 3
+
+    by_range = {row["value_range"]: row for row in analytics["win_rate_by_value_range"]}
+    assert by_range["<$50K"] == {"value_range": "<$50K", "quote_count": 1, "win_rate": 1.0}
+    assert by_range["$50K-$100K"]["win_rate"] == 0
+    assert by_range[">$500K"]["quote_count"] == 1
+
+def test_cached_analytics_are_copies(structured_db):
+    seed(structured_db)
+
+    first = structured_db.get_quote_analytics()
+    first["status_distribution"].clear()
+    first["monthly_trends"].append({"month": "bogus"})
+
+    second = structured_db.get_quote_analytics()
+    assert second is not first
+    assert second["status_distribution"] == {"accepted": 2, "rejected": 1, "pending": 1}
+    assert all(row["month"] != "bogus" for row in second["monthly_trends"])
+
+def test_writes_invalidate_cached_analytics(structured_db):
+    seed(structured_db)
+    assert structured_db.get_quote_analytics()["total_quotes"] == 4
+
+    store(structured_db, "Q5", "cust-102", 10_000.0, "2025-03-01T09:00:00")
+    assert structured_db.get_quote_analytics()["total_quotes"] == 5
+
+    structured_db.record_feedback("Q5", "Accepted", True)
+    assert structured_db.get_quote_analytics()["status_distribution"]["accepted"] == 3
+
+def test_customer_stats(structured_db):
+    seed(structured_db)
+
+    assert structured_db.get_customer_stats("cust-101") == {
+        "total_projects": 3,
+        "accepted_projects": 1,
+        "avg_project_size": 80_000.0
+    }
+    assert structured_db.get_customer_stats("cust-999") == {
+        "total_projects": 0,
+        "accepted_projects": 0,
+        "avg_project_size": 0
+    }
+
+def test_customer_quote_summaries_newest_first(structured_db):
+    seed(structured_db)
+
+    summaries = structured_db.get_customer_quote_summaries("cust-101")
+
+    assert summaries == [
+        {"quote_id": "Q3", "project_name": "Project Q3", "total_price": 80_000.0,
+         "timestamp": "2025-02-20T09:00:00", "status": "pending"},
+        {"quote_id": "Q2", "project_name": "Project Q2", "total_price": 120_000.0,
+         "timestamp": "2025-02-10T09:00:00", "status": "rejected"},
+        {"quote_id": "Q1", "project_name": "Project Q1", "total_price": 40_000.0,
+         "timestamp": "2025-01-10T09:00:00", "status": "accepted"}
+    ]
+    assert [quote["quote_id"] for quote in structured_db.get_customer_quotes("cust-101")] == ["Q3", "Q2", "Q1"]
+
+def test_customer_quote_summaries_use_covering_index(structured_db):
+    from db.structured_db import SQL_GET_CUSTOMER_QUOTE_SUMMARIES
+
+    plan = structured_db.conn.execute(
+        "EXPLAIN QUERY PLAN " + SQL_GET_CUSTOMER_QUOTE_SUMMARIES, ("cust-101",)
+    ).fetchall()
+
+    assert any("COVERING INDEX idx_quotes_cust_cover" in row[-1] for row in plan)
+
+def test_successful_quotes_in_range(structured_db):
+    seed(structured_db)
+    store(structured_db, "Q5", "cust-102", 45_000.0, "2025-03-01T09:00:00")
+    structured_db.record_feedback("Q5", "Accepted", True)
+
+    quotes = structured_db.get_successful_quotes_in_range(30_000, 50_000)
+
+    assert [quote["quote_id"] for quote in quotes] == ["Q5", "Q1"]